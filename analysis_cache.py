@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+# ✅ Parquet 저장은 pyarrow가 필요. 없으면 캐시는 조용히 비활성화
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except Exception:
+    HAS_PARQUET = False
+
+
+CACHE_DIR = os.environ.get("INNIS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "innis_insight"))
+CACHE_MAX_MB = float(os.environ.get("INNIS_CACHE_MAX_MB", "2048"))
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def analysis_cache_key(file_hash: str, ruleset_version: str, model: str = "rules") -> str:
+    """파일 내용 해시 + 규칙/모델 버전. 규칙이나 모델이 바뀌면 자동으로 다른 키가 됨."""
+    safe_model = "".join(ch if ch.isalnum() or ch in "-." else "_" for ch in model)
+    return f"{file_hash}_{ruleset_version}_{safe_model}"
+
+
+# ==============================================================================
+# [디스크 캐시(Parquet, LRU)]
+# ==============================================================================
+class AnalysisCache:
+    """분석 완료 DataFrame을 Parquet 파일로 보관. 용량 상한을 넘으면 가장 오래 안 쓴 항목부터 삭제."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def get(self, key: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            # 깨진 파일은 지우고 미스로 처리
+            self._remove(path)
+            return None
+        # 최근 사용 시각 갱신(LRU 기준)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp, index=True)
+            os.replace(tmp, path)
+        except Exception:
+            self._remove(tmp)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def size_bytes(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.root, n)) for n in os.listdir(self.root) if n.endswith(".parquet")
+        )
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@functools.lru_cache(maxsize=1)
+def default_cache():
+    if not HAS_PARQUET:
+        return None
+    try:
+        return AnalysisCache(os.path.join(CACHE_DIR, "analysis"), CACHE_MAX_MB * 1024 * 1024)
+    except OSError:
+        return None
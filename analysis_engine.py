@@ -0,0 +1,332 @@
+import functools
+import hashlib
+import json
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# ==============================================================================
+# [키워드 규칙 테이블]
+# - 위에서부터 먼저 매칭된 규칙이 우선(기존 if/elif 순서와 동일)
+# - 규칙을 바꾸면 RULESET_VERSION이 바뀌어 캐시된 분석 결과가 자동 무효화됨
+# ==============================================================================
+SENTIMENT_RULES = [
+    {"sentiment": "Positive", "keywords": ["love", "great", "amazing", "perfect", "best", "holy grail"]},
+    {"sentiment": "Negative", "keywords": ["worst", "hate", "terrible", "waste", "awful"]},
+    {"sentiment": "Negative", "keywords": ["broken", "damaged", "wrong item", "fake", "not authentic"]},
+    {"sentiment": "Negative", "keywords": ["disappointed", "too harsh", "too drying", "breakout", "irritation"]},
+]
+DEFAULT_SENTIMENT = "Neutral"
+
+# sentiment가 여기 있으면 Gap 규칙을 보지 않고 고정 결과를 사용
+SENTIMENT_OVERRIDES = {
+    "Positive": {"gap_type": "No Gap", "issue_detail": "Satisfied customer",
+                 "recommended_copy": "Thank you for your love!"},
+}
+
+GAP_RULES = [
+    {"gap_type": "Texture", "issue_detail": "Unpleasant texture or drying feeling",
+     "recommended_copy": "Lightweight, comfortable finish with clear usage tips.",
+     "keywords": ["sticky", "oily", "greasy", "heavy", "drying", "too dry", "flaky", "harsh"]},
+    {"gap_type": "Delivery", "issue_detail": "Delivery delay or shipping issue",
+     "recommended_copy": "Improved tracking updates and clearer delivery timelines.",
+     "keywords": ["delivery", "shipping", "late", "wait", "courier"]},
+    {"gap_type": "Product Quality", "issue_detail": "Damaged/defective or authenticity concern",
+     "recommended_copy": "Quality-checked packing and quick resolution via Shopee chat.",
+     "keywords": ["broken", "damaged", "leaked", "pump", "cracked", "dented", "defective", "fake"]},
+    {"gap_type": "Promotion", "issue_detail": "Missing/unclear freebies or promotion",
+     "recommended_copy": "Promo conditions are shown at checkout when successfully applied.",
+     "keywords": ["free gift", "freebie", "sample", "promo", "promotion"]},
+]
+DEFAULT_GAP = {"gap_type": "Product Performance", "issue_detail": "Performance did not meet expectation",
+               "recommended_copy": "Clear expectations with usage guide for best results."}
+
+ANALYSIS_COLUMNS = ["sentiment", "gap_type", "issue_detail", "recommended_copy"]
+# LLM 분석이 실패해 규칙 기반 결과로 채운 행 표시(bool). 작업/증분 단계까지만 쓰고 화면·캐시에 넘기기 전에 제거
+FALLBACK_COLUMN = "analysis_fallback"
+
+
+# ==============================================================================
+# [Aho-Corasick 자동자]
+# ==============================================================================
+class KeywordAutomaton:
+    """키워드 → 비트마스크. 텍스트를 한 번만 훑어서 걸린 모든 규칙 그룹의 OR 마스크를 반환."""
+
+    def __init__(self, keyword_masks: dict):
+        goto = [{}]
+        out = [0]
+        for kw, mask in keyword_masks.items():
+            state = 0
+            for ch in kw:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append(0)
+                    nxt = len(goto) - 1
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state] |= mask
+
+        # BFS로 실패 링크를 계산하면서, 실패 전이를 미리 펼쳐 DFA로 만든다
+        delta = [dict(g) for g in goto]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            out[state] |= out[fail[state]]
+            for ch, nxt in goto[state].items():
+                if state:
+                    fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+            for ch, nxt in delta[fail[state]].items():
+                delta[state].setdefault(ch, nxt)
+
+        self._delta = delta
+        self._out = out
+
+    def scan(self, text_lower: str) -> int:
+        delta = self._delta
+        out = self._out
+        state = 0
+        mask = 0
+        for ch in text_lower:
+            state = delta[state].get(ch, 0)
+            mask |= out[state]
+        return mask
+
+
+class CompiledRuleSet:
+    def __init__(self, sentiment_rules, gap_rules, default_sentiment, default_gap, overrides):
+        self.sentiment_rules = sentiment_rules
+        self.gap_rules = gap_rules
+        self.default_sentiment = default_sentiment
+        self.default_gap = default_gap
+        self.overrides = overrides
+
+        spec = {
+            "sentiment_rules": sentiment_rules,
+            "gap_rules": gap_rules,
+            "default_sentiment": default_sentiment,
+            "default_gap": default_gap,
+            "overrides": overrides,
+        }
+        payload = json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        self.version = hashlib.sha256(payload).hexdigest()[:12]
+
+        # 그룹 비트: [sentiment 규칙들..., gap 규칙들...]
+        keyword_masks = {}
+        for bit, rule in enumerate(list(sentiment_rules) + list(gap_rules)):
+            for kw in rule["keywords"]:
+                keyword_masks[kw.lower()] = keyword_masks.get(kw.lower(), 0) | (1 << bit)
+        self._automaton = KeywordAutomaton(keyword_masks)
+        self._n_sent = len(sentiment_rules)
+        self._resolved = {}
+
+    def match_mask(self, text) -> int:
+        return self._automaton.scan(str(text).lower())
+
+    def resolve(self, mask: int):
+        """매칭 마스크 → 4개 분석 값(tuple). 같은 마스크는 한 번만 계산."""
+        hit = self._resolved.get(mask)
+        if hit is not None:
+            return hit
+
+        sentiment = self.default_sentiment
+        for bit, rule in enumerate(self.sentiment_rules):
+            if mask >> bit & 1:
+                sentiment = rule["sentiment"]
+                break
+
+        gap = self.overrides.get(sentiment)
+        if gap is None:
+            gap = self.default_gap
+            for bit, rule in enumerate(self.gap_rules, start=self._n_sent):
+                if mask >> bit & 1:
+                    gap = rule
+                    break
+
+        hit = (sentiment, gap["gap_type"], gap["issue_detail"], gap["recommended_copy"])
+        self._resolved[mask] = hit
+        return hit
+
+    def classify(self, text):
+        return self.resolve(self.match_mask(text))
+
+
+RULESET = CompiledRuleSet(SENTIMENT_RULES, GAP_RULES, DEFAULT_SENTIMENT, DEFAULT_GAP, SENTIMENT_OVERRIDES)
+RULESET_VERSION = RULESET.version
+
+
+# ==============================================================================
+# [단건 분석(시뮬레이션)]
+# ==============================================================================
+def smart_mock_analysis(text: str):
+    sentiment, gap_type, issue, rec_copy = RULESET.classify(text)
+    return {
+        "sentiment": sentiment,
+        "gap_type": gap_type,
+        "issue_detail": issue if issue else "Satisfied customer",
+        "recommended_copy": rec_copy if rec_copy else "Thank you for your love!"
+    }
+
+
+# ==============================================================================
+# [일괄 분석]
+# ==============================================================================
+def _resolve_masks(masks, codes, out_index, ruleset):
+    # 서로 다른 마스크 종류는 규칙 수에 비례해 적으므로, 마스크 단위로 해석 후 펼침
+    mask_codes, mask_uniques = pd.factorize(np.asarray(masks, dtype=object))
+    resolved = np.array([ruleset.resolve(m) for m in mask_uniques], dtype=object).reshape(-1, len(ANALYSIS_COLUMNS))
+    rows = mask_codes[codes]
+    return pd.DataFrame({col: resolved[rows, j] for j, col in enumerate(ANALYSIS_COLUMNS)}, index=out_index)
+
+
+def _factorize_texts(texts: pd.Series):
+    # ✅ 중복 리뷰는 한 번만 분류하고 코드로 되돌려 펼침
+    # (결측은 str() 변환 시 'nan'/'None'이 되며 어떤 키워드에도 걸리지 않으므로 빈 문자열과 결과가 같음)
+    return pd.factorize(texts.fillna("").astype(str), use_na_sentinel=False)
+
+
+def _empty_result(index):
+    return pd.DataFrame({c: pd.Series(dtype=object) for c in ANALYSIS_COLUMNS}, index=index)
+
+
+def analyze_reviews(texts: pd.Series, ruleset: CompiledRuleSet = None) -> pd.DataFrame:
+    """리뷰 컬럼 전체를 한 번에 분류. smart_mock_analysis와 동일한 라벨을 반환."""
+    ruleset = ruleset or RULESET
+    texts = pd.Series(texts)
+    if texts.empty:
+        return _empty_result(texts.index)
+
+    codes, uniques = _factorize_texts(texts)
+    masks = [ruleset.match_mask(t) for t in uniques]
+    return _resolve_masks(masks, codes, texts.index, ruleset)
+
+
+# ==============================================================================
+# [병렬 분석(프로세스 풀)]
+# - 고유 텍스트를 UTF-8 바이트 + 오프셋 배열로 공유 메모리에 한 번 올리고,
+#   워커는 (시작, 끝) 범위만 받아 직접 읽음 → 행 객체를 pickle로 넘기지 않음
+# - 워커는 규칙 마스크(int64 배열)만 돌려주고, 라벨 해석은 부모에서 → 결과는 워커 수와 무관하게 동일
+# ==============================================================================
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+PARALLEL_WORKERS = int(os.environ.get("INNIS_ANALYSIS_WORKERS", "0")) or _available_cpus()
+PARALLEL_MIN_ROWS = 200_000
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+
+# ✅ multiprocessing/프로세스 풀 모듈은 병렬 분석을 실제로 쓸 때 import(앱 시작 시간에서 제외)
+def _pack_texts(uniques):
+    from multiprocessing import shared_memory
+
+    encoded = [t.encode("utf-8") for t in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = b"".join(encoded)
+
+    data_shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    data_shm.buf[:len(data)] = data
+    offsets_shm = shared_memory.SharedMemory(create=True, size=offsets.nbytes)
+    np.ndarray(offsets.shape, dtype=np.int64, buffer=offsets_shm.buf)[:] = offsets
+    return data_shm, offsets_shm
+
+
+def _scan_chunk(data_name, offsets_name, n_texts, start, end):
+    from multiprocessing import shared_memory
+
+    data_shm = shared_memory.SharedMemory(name=data_name)
+    offsets_shm = shared_memory.SharedMemory(name=offsets_name)
+    try:
+        offsets = np.ndarray((n_texts + 1,), dtype=np.int64, buffer=offsets_shm.buf)
+        buf = data_shm.buf
+        masks = np.empty(end - start, dtype=np.int64)
+        for k, i in enumerate(range(start, end)):
+            text = bytes(buf[offsets[i]:offsets[i + 1]]).decode("utf-8")
+            masks[k] = RULESET.match_mask(text)
+        del offsets, buf
+        return start, masks
+    finally:
+        data_shm.close()
+        offsets_shm.close()
+
+
+@functools.lru_cache(maxsize=4)
+def _process_pool(workers: int):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Streamlit은 스레드가 많은 프로세스라 fork 대신 spawn 사용(풀은 재사용)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def analyze_reviews_parallel(texts: pd.Series, workers: int = None, on_progress=None) -> pd.DataFrame:
+    """analyze_reviews의 멀티 프로세스 버전(기본 규칙셋 전용). 결과는 analyze_reviews와 동일."""
+    workers = workers or PARALLEL_WORKERS
+    texts = pd.Series(texts)
+    # 마스크를 int64로 주고받으므로 규칙 그룹이 63개를 넘으면 단일 프로세스로 처리
+    if workers < 2 or len(SENTIMENT_RULES) + len(GAP_RULES) > 63:
+        return analyze_reviews(texts)
+    if texts.empty:
+        return _empty_result(texts.index)
+
+    from concurrent.futures import as_completed
+
+    codes, uniques = _factorize_texts(texts)
+    n = len(uniques)
+    data_shm, offsets_shm = _pack_texts(uniques)
+    try:
+        chunk = max(1, -(-n // (workers * PARALLEL_CHUNKS_PER_WORKER)))
+        pool = _process_pool(workers)
+        futures = [
+            pool.submit(_scan_chunk, data_shm.name, offsets_shm.name, n, start, min(start + chunk, n))
+            for start in range(0, n, chunk)
+        ]
+        masks = np.empty(n, dtype=np.int64)
+        done = 0
+        for fut in as_completed(futures):
+            start, part = fut.result()
+            masks[start:start + len(part)] = part
+            done += len(part)
+            if on_progress is not None:
+                on_progress(done, n)
+    finally:
+        data_shm.close()
+        data_shm.unlink()
+        offsets_shm.close()
+        offsets_shm.unlink()
+
+    return _resolve_masks(masks.tolist(), codes, texts.index, RULESET)
+
+
+def apply_analysis(df: pd.DataFrame, text_col: str = "review_text_original", chunk_size: int = 50_000,
+                   on_progress=None, workers: int = 1) -> pd.DataFrame:
+    """df에 분석 4개 컬럼을 채운 새 DataFrame을 반환. on_progress(done, total)로 진행률 보고.
+
+    workers > 1 이고 행 수가 PARALLEL_MIN_ROWS 이상이면 프로세스 풀로 분석.
+    """
+    total = len(df)
+    texts = df[text_col] if text_col in df.columns else pd.Series([""] * total, index=df.index)
+
+    if workers and workers > 1 and total >= PARALLEL_MIN_ROWS:
+        analyzed = analyze_reviews_parallel(texts, workers=workers, on_progress=on_progress)
+    else:
+        parts = []
+        for start in range(0, total, chunk_size):
+            parts.append(analyze_reviews(texts.iloc[start:start + chunk_size]))
+            if on_progress is not None:
+                on_progress(min(start + chunk_size, total), total)
+        analyzed = pd.concat(parts) if parts else analyze_reviews(texts)
+
+    out = df.copy()
+    for col in ANALYSIS_COLUMNS:
+        out[col] = analyzed[col].to_numpy()
+    return out
@@ -0,0 +1,104 @@
+"""Gap Analysis 벤치마크: 기존 행 단위 키워드 스캔 루프 vs 일괄 analyze_reviews.
+
+legacy_mock_analysis는 규칙 테이블 도입 전 smart_mock_analysis(if/elif 버전)의 사본으로,
+라벨 일치(parity) 기준으로 사용한다.
+
+실행: python benchmarks/bench_analysis.py --rows 300000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_engine import ANALYSIS_COLUMNS, RULESET_VERSION, analyze_reviews, smart_mock_analysis  # noqa: E402
+
+FRAGMENTS = [
+    "I love this toner", "holy grail for my skin", "worst purchase ever", "arrived broken",
+    "the pump leaked everywhere", "too sticky and oily", "delivery was late again",
+    "no free gift in the box", "seems fake, not authentic", "caused a breakout",
+    "a bit too drying for me", "it's okay I guess", "waiting for the courier", "feels heavy",
+    "Disappointed with the result", "wrong item received", "nothing special", "", "cracked cap",
+]
+
+
+def legacy_mock_analysis(text):
+    text_lower = str(text).lower()
+
+    if any(w in text_lower for w in ["love", "great", "amazing", "perfect", "best", "holy grail"]):
+        sentiment = "Positive"
+    elif any(w in text_lower for w in ["worst", "hate", "terrible", "waste", "awful"]):
+        sentiment = "Negative"
+    elif any(w in text_lower for w in ["broken", "damaged", "wrong item", "fake", "not authentic"]):
+        sentiment = "Negative"
+    elif any(w in text_lower for w in ["disappointed", "too harsh", "too drying", "breakout", "irritation"]):
+        sentiment = "Negative"
+    else:
+        sentiment = "Neutral"
+
+    if sentiment == "Positive":
+        return {"sentiment": sentiment, "gap_type": "No Gap", "issue_detail": "Satisfied customer",
+                "recommended_copy": "Thank you for your love!"}
+    if any(w in text_lower for w in ["sticky", "oily", "greasy", "heavy", "drying", "too dry", "flaky", "harsh"]):
+        gap = ("Texture", "Unpleasant texture or drying feeling",
+               "Lightweight, comfortable finish with clear usage tips.")
+    elif any(w in text_lower for w in ["delivery", "shipping", "late", "wait", "courier"]):
+        gap = ("Delivery", "Delivery delay or shipping issue",
+               "Improved tracking updates and clearer delivery timelines.")
+    elif any(w in text_lower for w in ["broken", "damaged", "leaked", "pump", "cracked", "dented", "defective", "fake"]):
+        gap = ("Product Quality", "Damaged/defective or authenticity concern",
+               "Quality-checked packing and quick resolution via Shopee chat.")
+    elif any(w in text_lower for w in ["free gift", "freebie", "sample", "promo", "promotion"]):
+        gap = ("Promotion", "Missing/unclear freebies or promotion",
+               "Promo conditions are shown at checkout when successfully applied.")
+    else:
+        gap = ("Product Performance", "Performance did not meet expectation",
+               "Clear expectations with usage guide for best results.")
+    return {"sentiment": sentiment, "gap_type": gap[0], "issue_detail": gap[1], "recommended_copy": gap[2]}
+
+
+def make_reviews(rows: int, seed: int = 7) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, len(FRAGMENTS), rows)
+    b = rng.integers(0, len(FRAGMENTS), rows)
+    serial = rng.integers(0, 50, rows)
+    texts = [f"{FRAGMENTS[i]}. {FRAGMENTS[j]} #{k}" for i, j, k in zip(a, b, serial)]
+    texts[::97] = [np.nan] * len(texts[::97])
+    return pd.Series(texts, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    texts = make_reviews(args.rows)
+
+    t0 = time.perf_counter()
+    loop = pd.DataFrame([legacy_mock_analysis(t) for t in texts], index=texts.index)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    single = pd.DataFrame([smart_mock_analysis(t) for t in texts], index=texts.index)
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = analyze_reviews(texts)
+    t_batch = time.perf_counter() - t0
+
+    mismatch = int((loop[ANALYSIS_COLUMNS] != batch[ANALYSIS_COLUMNS]).any(axis=1).sum())
+    mismatch += int((loop[ANALYSIS_COLUMNS] != single[ANALYSIS_COLUMNS]).any(axis=1).sum())
+    print(
+        f"rules={RULESET_VERSION} rows={args.rows} legacy_loop={t_loop:.3f}s automaton_loop={t_single:.3f}s "
+        f"batch={t_batch:.3f}s speedup={t_loop / t_batch:.1f}x mismatches={mismatch}"
+    )
+    if mismatch:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""CSV 로딩 벤치마크: 기존 python 엔진(sep=None) 파싱 vs ingest.read_reviews_csv.
+
+실행: python benchmarks/bench_ingest.py --rows 200000 [--sep tab] [--encoding cp949]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import normalize_columns, read_reviews_csv  # noqa: E402
+from bench_analysis import make_reviews  # noqa: E402
+
+
+def make_csv_bytes(rows: int, sep: str = ",", encoding: str = "utf-8", seed: int = 7) -> bytes:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "상품명": rng.choice(["Green Tea Serum", "Volcanic Clay Mask", "Retinol Cica Ampoule"], rows),
+        "리뷰": make_reviews(rows, seed=seed),
+        "별점": rng.integers(1, 6, rows),
+        "국가": rng.choice(["SG", "MY", "TH"], rows),
+        "channel": rng.choice(["Shopee Mall", "Shopee"], rows),
+        "피부타입": rng.choice(["Oily", "Dry", "Combination", "Sensitive"], rows),
+    })
+    return df.to_csv(index=False, sep=sep).encode(encoding)
+
+
+def legacy_read(raw: bytes) -> pd.DataFrame:
+    file = io.BytesIO(raw)
+    df = pd.read_csv(file, sep=None, engine="python")
+    if len(df.columns) == 1 and ("\t" in str(df.columns[0])):
+        file.seek(0)
+        df = pd.read_csv(file, sep="\t")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--sep", choices=["comma", "tab"], default="comma")
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+
+    raw = make_csv_bytes(args.rows, sep="\t" if args.sep == "tab" else ",", encoding=args.encoding)
+
+    t0 = time.perf_counter()
+    new = normalize_columns(read_reviews_csv(io.BytesIO(raw)))
+    t_new = time.perf_counter() - t0
+
+    legacy = None
+    t_legacy = float("nan")
+    if args.encoding.replace("-", "").lower() in ("utf8", "utf8sig"):
+        t0 = time.perf_counter()
+        legacy = normalize_columns(legacy_read(raw))
+        t_legacy = time.perf_counter() - t0
+
+    same = "n/a"
+    if legacy is not None:
+        cols = list(legacy.columns)
+        same = (
+            list(new.columns) == cols
+            and legacy["review_text_original"].fillna("").astype(str).equals(new["review_text_original"].fillna("").astype(str))
+            and np.allclose(legacy["rating"].astype(float), new["rating"].astype(float), equal_nan=True)
+        )
+    print(f"rows={args.rows} bytes={len(raw)} legacy={t_legacy:.3f}s fast={t_new:.3f}s "
+          f"speedup={t_legacy / t_new:.1f}x same={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""LLM 분석 모드 처리량 측정(오프라인 스텁 서버 사용).
+
+실행: python benchmarks/bench_llm.py --rows 400 --concurrency 16 --rate 200 --latency 0.05 --fail-rate 0.1
+묶음 요청 비교: --pack-tokens 0(리뷰당 요청 1개) vs --pack-tokens 3000 --drop-rate 0.05(빠진 항목 재요청 포함)
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_engine import ANALYSIS_COLUMNS, analyze_reviews  # noqa: E402
+from bench_analysis import make_reviews  # noqa: E402
+from llm_backend import LLM_PACK_MAX_ITEMS, LLM_PACK_TOKENS, analyze_reviews_llm  # noqa: E402
+from llm_stub_server import start_stub_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--pack-tokens", type=int, default=LLM_PACK_TOKENS, help="0이면 묶음 요청 끔")
+    parser.add_argument("--pack-max-items", type=int, default=LLM_PACK_MAX_ITEMS)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="묶음 응답에서 스텁이 빼먹는 항목 비율")
+    args = parser.parse_args()
+
+    server, base_url, counters = start_stub_server(latency=args.latency, fail_rate=args.fail_rate,
+                                                   drop_rate=args.drop_rate)
+    try:
+        # 고유 텍스트 수 = 요청 수가 되도록 행마다 다른 리뷰 사용
+        texts = make_reviews(args.rows).fillna("") + [f" ({i})" for i in range(args.rows)]
+        out, stats = analyze_reviews_llm(texts, api_key="stub", base_url=base_url,
+                                         concurrency=args.concurrency, rate_per_sec=args.rate,
+                                         pack_tokens=args.pack_tokens, pack_max_items=args.pack_max_items)
+    finally:
+        server.shutdown()
+
+    expected = analyze_reviews(texts)
+    mismatch = int((out[ANALYSIS_COLUMNS] != expected[ANALYSIS_COLUMNS]).any(axis=1).sum())
+    print(
+        f"rows={stats['reviews']} unique={stats['unique']} requests={stats['requests']} "
+        f"retries={stats['retries']} split_retries={stats['split_retries']} failed={stats['failed']} "
+        f"server_failures={counters['failures']} elapsed={stats['elapsed']:.2f}s "
+        f"throughput={stats['reviews_per_sec']:.1f} reviews/s requests_per_1k={stats['requests_per_1k']:.0f} "
+        f"tokens_per_review={stats['tokens_per_review']:.0f} mismatches={mismatch}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""병렬 Gap Analysis 벤치마크: 워커 수별 analyze_reviews_parallel vs 단일 프로세스 analyze_reviews.
+
+고유 텍스트 비율이 높을수록(중복 제거 효과가 작을수록) 병렬화 이득이 크므로 --unique로 조절.
+첫 호출의 프로세스 기동 비용은 warm-up으로 분리해서 측정한다.
+
+실행: python benchmarks/bench_parallel.py --rows 1000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_engine import PARALLEL_WORKERS, analyze_reviews, analyze_reviews_parallel  # noqa: E402
+from bench_analysis import make_reviews  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, PARALLEL_WORKERS}))
+    parser.add_argument("--unique", type=float, default=1.0, help="고유 텍스트 비율(0~1)")
+    args = parser.parse_args()
+
+    texts = make_reviews(args.rows)
+    n_unique = int(args.rows * args.unique)
+    # 행 번호를 붙여 고유 텍스트 수를 맞춤(키워드 매칭 결과에는 영향 없음)
+    texts = pd.Series([f"{t} r{i % max(1, n_unique)}" if isinstance(t, str) else t for i, t in enumerate(texts)],
+                      dtype=object)
+
+    t0 = time.perf_counter()
+    serial = analyze_reviews(texts)
+    t_serial = time.perf_counter() - t0
+    print(f"rows={args.rows} unique~{n_unique} cpus={PARALLEL_WORKERS} serial={t_serial:.3f}s")
+
+    failed = False
+    for workers in args.workers:
+        analyze_reviews_parallel(texts.iloc[:1000], workers=workers)  # warm-up: 워커 기동
+        t0 = time.perf_counter()
+        result = analyze_reviews_parallel(texts, workers=workers)
+        elapsed = time.perf_counter() - t0
+        same = result.equals(serial)
+        failed |= not same
+        print(f"workers={workers} time={elapsed:.3f}s speedup={t_serial / elapsed:.2f}x identical={same}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
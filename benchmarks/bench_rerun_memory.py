@@ -0,0 +1,92 @@
+"""대시보드 rerun 한 번의 최대 메모리(tracemalloc peak) 측정.
+
+이미 분석된 합성 CSV를 업로드한 상태에서, 필터/제품/검색/평점/포트폴리오 조작마다 rerun을 걸고
+rerun 동안의 할당 peak를 잰다. numpy/파이썬 객체 할당만 집계(Arrow 문자열 버퍼는 제외).
+
+실행: python benchmarks/bench_rerun_memory.py --rows 200000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from analysis_engine import apply_analysis  # noqa: E402
+from bench_ingest import make_csv_bytes  # noqa: E402
+from ingest import normalize_columns, parse_reviews_bytes  # noqa: E402
+
+
+def _app_script(root, csv_path):
+    import sys as _sys
+    _sys.path.insert(0, root)
+    import io as _io
+
+    import streamlit as _st
+
+    with open(csv_path, "rb") as f:
+        raw = f.read()
+
+    class _Upload(_io.BytesIO):
+        name = "reviews.csv"
+        file_id = "bench"
+
+    _st.file_uploader = lambda *a, **k: _Upload(raw)
+    import app
+    app.main()
+
+
+def measure(at, label, action):
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    errors = [e.value for e in at.exception]
+    print(f"{label:<12} peak=+{(peak - base) / 1e6:8.1f}MB time={elapsed:6.2f}s" + (f" errors={errors}" if errors else ""))
+    return peak - base
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # 분석이 끝난 파일을 올린 상황을 재현(분석 비용은 측정에서 제외)
+    df = apply_analysis(normalize_columns(parse_reviews_bytes(make_csv_bytes(args.rows))))
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False)
+    tmp = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+    tmp.write(buf.getvalue())
+    tmp.close()
+    os.environ.setdefault("INNIS_CACHE_DIR", tempfile.mkdtemp())
+
+    at = AppTest.from_function(_app_script, args=(ROOT, tmp.name), default_timeout=600)
+    tracemalloc.start()
+    try:
+        measure(at, "load", at.run)
+        measure(at, "rerun", at.run)
+
+        def _select(label, pick):
+            box = {s.label: s for s in at.selectbox}[label]
+            box.select(pick(box.options)).run()
+
+        measure(at, "country", lambda: _select("국가", lambda o: o[1]))
+        measure(at, "product", lambda: _select("제품 선택", lambda o: o[-1]))
+        measure(at, "search", lambda: [t for t in at.text_input if t.label.startswith("검색")][0].input("late").run())
+        measure(at, "rating", lambda: at.slider[0].set_value((2, 4)).run())
+        measure(at, "portfolio", lambda: at.multiselect[0].set_value(at.multiselect[0].options[:2]).run())
+    finally:
+        tracemalloc.stop()
+        os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""콜드 스타트 벤치마크: 새 파이썬 프로세스마다 랜딩 화면(업로드 전)을 한 번 그리고 시간 측정.
+
+- streamlit : streamlit(+테스트 러너) import — 서버가 떠 있으면 이미 올라와 있는 비용
+- imports   : app.py import 구간(profiling.mark_startup("imports"))
+- first_paint: app.py 첫 줄 → 첫 rerun 끝(랜딩 화면 완료)
+- warm_rerun: 같은 프로세스에서 두 번째 rerun
+- 랜딩 화면까지 plotly/openai 등 무거운 모듈이 올라왔는지도 표시(지연 import가 깨졌는지 확인)
+
+실행:
+  python benchmarks/bench_startup.py --runs 5
+  python benchmarks/bench_startup.py --runs 5 --max-first-paint 1.5   # 넘으면 exit 1(CI용)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_streamlit = time.perf_counter() - t0
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+t1 = time.perf_counter()
+at.run()
+warm = time.perf_counter() - t1
+sys.path.insert(0, sys.argv[2])
+from profiling import startup_report
+heavy = [m for m in ("plotly.express", "openai", "pyarrow.parquet", "concurrent.futures.process") if m in sys.modules]
+print(json.dumps({"streamlit": t_streamlit, "warm_rerun": warm, "loaded_heavy": heavy,
+                  "exceptions": [e.value for e in at.exception], **startup_report()}))
+"""
+
+
+def run_once(env):
+    out = subprocess.run([sys.executable, "-c", PROBE, os.path.join(ROOT, "app.py"), ROOT],
+                         capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-first-paint", type=float, default=None, help="초. 중앙값이 넘으면 실패")
+    args = parser.parse_args()
+
+    env = dict(os.environ, INNIS_STARTUP_PROFILE="0")
+    runs = [run_once(env) for _ in range(args.runs)]
+    for key in ["streamlit", "imports", "first_paint", "warm_rerun"]:
+        values = [r[key] for r in runs if r.get(key) is not None]
+        print(f"{key:<12} median={statistics.median(values) * 1000:8.1f}ms  min={min(values) * 1000:8.1f}ms")
+    last = runs[-1]
+    print(f"landing에서 올라온 무거운 모듈: {last['loaded_heavy'] or '없음'}")
+    if last["exceptions"]:
+        print(f"예외: {last['exceptions']}")
+
+    if args.max_first_paint is not None:
+        first_paint = statistics.median(r["first_paint"] for r in runs)
+        if first_paint > args.max_first_paint:
+            print(f"FAIL first_paint {first_paint:.3f}s > {args.max_first_paint:.3f}s")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
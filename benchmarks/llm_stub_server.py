@@ -0,0 +1,130 @@
+"""오프라인 테스트용 OpenAI 호환 스텁 서버(/v1/chat/completions).
+
+분석 요청에는 규칙 기반 smart_mock_analysis 결과(JSON), Smart Reply 요청에는 고정 문구로 응답하며,
+지연/429/503을 주입할 수 있다. 묶음 요청(user 메시지가 {"i", "review"} JSON 배열)에는 {"items": [...]}로 응답하고,
+drop_rate 비율만큼 항목을 빼서 나눠 다시 요청하는 경로를 시험할 수 있다.
+단독 실행: python benchmarks/llm_stub_server.py --port 8765 --latency 0.05 --fail-rate 0.1 --drop-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_engine import smart_mock_analysis  # noqa: E402
+
+
+def _reply_text(text):
+    return f"Thanks for sharing this, we are sorry about: {text[:60]}. Please contact us via Shopee chat."
+
+
+def _packed_content(system, items, keep):
+    out = []
+    for item in items:
+        if not keep():
+            continue
+        if "customer support agent" in system:
+            out.append({"i": item["i"], "reply": _reply_text(item["review"])})
+        else:
+            out.append({"i": item["i"], **smart_mock_analysis(item["review"])})
+    return json.dumps({"items": out})
+
+
+def _make_handler(latency: float, fail_rate: float, seed: int, drop_rate: float = 0.0):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counters = {"requests": 0, "failures": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            return
+
+        def _send(self, code, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            req = json.loads(self.rfile.read(length) or b"{}")
+            with lock:
+                counters["requests"] += 1
+                roll = rng.random()
+            if latency:
+                time.sleep(latency)
+
+            if roll < fail_rate:
+                with lock:
+                    counters["failures"] += 1
+                code = 429 if roll < fail_rate / 2 else 503
+                self._send(code, {"error": {"message": "stub injected failure", "type": "stub", "code": code}},
+                           headers={"retry-after": "0"} if code == 429 else None)
+                return
+
+            messages = req.get("messages", [])
+            system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+            user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+            text = user.split("Review:", 1)[1].split("\nIssue:", 1)[0].strip() if "Review:" in user else user
+            if user.startswith("[") and '"items"' in system:
+                def _keep():
+                    with lock:
+                        return rng.random() >= drop_rate
+                content = _packed_content(system, json.loads(user), _keep)
+            elif "customer support agent" in system:
+                content = _reply_text(text)
+            else:
+                content = json.dumps(smart_mock_analysis(text))
+            self._send(200, {
+                "id": f"chatcmpl-stub-{counters['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                # 시스템 프롬프트 포함(묶음 요청의 절감분이 보이도록)
+                "usage": {"prompt_tokens": (len(system) + len(user)) // 4, "completion_tokens": len(content) // 4,
+                          "total_tokens": (len(system) + len(user) + len(content)) // 4},
+            })
+
+    return Handler, counters
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0,
+                      drop_rate: float = 0.0):
+    """백그라운드 스레드로 스텁 서버 실행. (server, base_url, counters) 반환. 종료는 server.shutdown()."""
+    handler, counters = _make_handler(latency, fail_rate, seed, drop_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", counters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, base_url, _ = start_stub_server(args.port, args.latency, args.fail_rate, drop_rate=args.drop_rate)
+    print(f"stub OpenAI server on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""벤치마크 스위트: 합성 Shopee 리뷰(10k/100k/1M행)로 앱의 주요 단계를 측정하고 JSON으로 저장.
+
+단계(앱과 같은 함수 사용)
+- load          : 내용 해시 + 파싱 + 컬럼 정리 + 라벨 코드 + 메모리 절약 변환(load_data_with_state 캐시 미스 경로)
+- data_quality  : compute_data_quality
+- analysis      : apply_analysis(규칙 기반) + 라벨 코드 + 메모리 절약 변환
+- filter_build / filter_select : FilterIndex 생성 / 필터 조합 선택
+- search_build / search_query  : TextSearchIndex 생성 / 검색어 질의
+- score         : 제품별 compute_vob_voc_score
+- portfolio     : compute_portfolio_stats(전체 제품)
+
+실행:
+  python benchmarks/run_suite.py                          # 10k, 100k, 1M
+  python benchmarks/run_suite.py --sizes 10000 --repeat 5
+  python benchmarks/run_suite.py --compare results/old.json results/new.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+# app.py 임포트 시 나오는 streamlit bare 모드 경고(missing ScriptRunContext)는 무시해도 됨
+import app  # noqa: E402
+from analysis_cache import content_hash  # noqa: E402
+from analysis_engine import RULESET_VERSION, apply_analysis  # noqa: E402
+from filter_index import FilterIndex, GroupIndex, TextSearchIndex, search_positions, take  # noqa: E402
+from ingest import normalize_columns, parse_reviews_bytes  # noqa: E402
+from labels import LABEL_CODE_COLUMNS, add_label_codes  # noqa: E402
+from memory_layout import compact_frame  # noqa: E402
+from synth_data import synthetic_csv_path  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+FILTER_CASES = [
+    {},
+    {"country": "SG"},
+    {"country": "MY", "channel": "Shopee Mall"},
+    {"country": "TH", "channel": "Shopee", "skin_type": "Oily"},
+]
+RATING_CASES = [(1, 5), (1, 2), (4, 5)]
+SEARCH_QUERIES = ["sticky", "deliv*", "free gift", "broken pump", "zzzz"]
+
+
+def _timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, times
+
+
+def run_size(rows: int, seed: int, repeat: int, data_dir: str = None):
+    path = synthetic_csv_path(rows, seed, data_dir)
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    results = []
+
+    def record(stage, fn, n_repeat=repeat, **extra):
+        value, times = _timed(fn, n_repeat)
+        results.append({
+            "rows": rows, "stage": stage, "repeat": n_repeat,
+            "seconds_min": min(times), "seconds_median": statistics.median(times),
+            "rows_per_sec": rows / min(times) if min(times) > 0 else None, **extra,
+        })
+        print(f"  {rows:>9,} {stage:<14} min={min(times):8.4f}s median={statistics.median(times):8.4f}s")
+        return value
+
+    def _load():
+        content_hash(raw)
+        return compact_frame(add_label_codes(normalize_columns(parse_reviews_bytes(raw))))
+
+    loaded = record("load", _load, bytes=len(raw))
+    record("data_quality", lambda: app.compute_data_quality(loaded))
+
+    # 분석은 가장 무거운 단계라 1M에서는 한 번만
+    analysis_repeat = 1 if rows >= 1_000_000 else repeat
+    df = record("analysis", lambda: compact_frame(add_label_codes(apply_analysis(loaded))), n_repeat=analysis_repeat)
+
+    fidx = record("filter_build", lambda: FilterIndex(df))
+    record("filter_select", lambda: [fidx.select(sel, rating_range=r) for sel in FILTER_CASES for r in RATING_CASES],
+           cases=len(FILTER_CASES) * len(RATING_CASES))
+
+    sidx = record("search_build", lambda: TextSearchIndex(df))
+    all_rows = np.arange(len(df))
+
+    def _search():
+        # 인덱스 안의 질의 memo를 비워 매번 콜드 검색 시간을 잰다
+        sidx._memo.clear()
+        return [search_positions(df, sidx, all_rows, q) for q in SEARCH_QUERIES]
+
+    record("search_query", _search, cases=len(SEARCH_QUERIES))
+
+    pidx = GroupIndex(df["product_name"])
+    all_pos = np.arange(len(df))
+
+    def _score():
+        return [app.compute_vob_voc_score(take(df, pidx.positions_of(all_pos, p), LABEL_CODE_COLUMNS))
+                for p in pidx.labels_at(all_pos)]
+    record("score", _score, products=len(pidx.labels))
+    record("portfolio", lambda: app.compute_portfolio_stats(df, pidx, all_pos))
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "ruleset": RULESET_VERSION,
+    }
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    base = {(r["rows"], r["stage"]): r["seconds_min"] for r in old["results"]}
+    print(f"{old['env'].get('commit')} -> {new['env'].get('commit')}")
+    for r in new["results"]:
+        before = base.get((r["rows"], r["stage"]))
+        if before is None:
+            continue
+        ratio = r["seconds_min"] / before if before > 0 else float("nan")
+        flag = "  SLOWER" if ratio > 1.1 else ("  faster" if ratio < 0.9 else "")
+        print(f"{r['rows']:>9,} {r['stage']:<14} {before:8.4f}s -> {r['seconds_min']:8.4f}s  x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=None, help="합성 CSV 보관 위치(기본: benchmarks/data)")
+    parser.add_argument("--out", default=os.path.join(HERE, "results"))
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    env = environment()
+    print(f"commit={env['commit']} python={env['python']} pandas={env['pandas']} cpus={env['cpus']}")
+    results = []
+    for rows in args.sizes:
+        results.extend(run_size(rows, args.seed, args.repeat, args.data_dir))
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_path = os.path.join(args.out, f"suite-{stamp}-{env['commit'] or 'nogit'}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"env": env, "seed": args.seed, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"saved {out_path}")
+
+
+if __name__ == "__main__":
+    main()
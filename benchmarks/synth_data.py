@@ -0,0 +1,133 @@
+"""Shopee 형식 합성 리뷰 CSV 생성기(벤치마크 스위트용).
+
+- 제품마다 품질 성향(긍정 비율, 주요 불만 유형)이 달라 제품별 점수/Gap 분포가 갈림
+- 리뷰 = 감정 문장 + (불만이면) 이슈 문장 + 잡담/이모지, 평점은 감정과 상관
+- 복사/붙여넣기 중복, 빈 리뷰, 결측 피부타입 등 실제 파일의 지저분함도 일부 포함
+같은 (rows, seed)면 항상 같은 바이트를 만든다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+PRODUCTS = [
+    "Green Tea Seed Serum", "Volcanic Pore Clay Mask", "Retinol Cica Ampoule", "Jeju Cherry Blossom Cream",
+    "Black Tea Youth Serum", "Bija Trouble Lotion", "Daily UV Defense Sunscreen", "Super Volcanic Clay Mousse",
+    "Green Tea Hyaluronic Toner", "Orchid Enriched Cream", "Aloe Revital Soothing Gel", "Cica Balm",
+    "No Sebum Mineral Powder", "My Real Squeeze Mask", "Apple Seed Cleansing Oil", "Bija Cica Balm",
+    "Soybean Energy Essence", "Perfect UV Protection Cream", "Brightening Pore Serum", "Dewy Glow Jelly Cream",
+]
+COUNTRIES = ["SG", "MY", "TH", "PH", "VN", "ID"]
+COUNTRY_WEIGHTS = [0.30, 0.22, 0.16, 0.12, 0.10, 0.10]
+CHANNELS = ["Shopee Mall", "Shopee"]
+SKIN_TYPES = ["Oily", "Dry", "Combination", "Sensitive", "Normal"]
+
+POSITIVE = [
+    "I love this", "holy grail for my skin", "amazing results after a week", "perfect for daily use",
+    "best serum I've tried", "great value, will repurchase", "my skin looks great",
+]
+NEUTRAL = ["it's okay I guess", "nothing special", "average product", "does the job", "not sure yet"]
+NEGATIVE = [
+    "worst purchase ever", "terrible, waste of money", "so disappointed", "I hate how it feels",
+    "awful experience", "disappointed with the result",
+]
+ISSUES = {
+    "texture": ["too sticky and oily", "feels heavy on the skin", "a bit too drying", "leaves a greasy film", "flaky after use"],
+    "delivery": ["delivery was late again", "shipping took 3 weeks", "had to wait for the courier", "late delivery"],
+    "quality": ["arrived broken", "the pump leaked everywhere", "cracked cap", "seems fake, not authentic", "dented box, defective pump"],
+    "promotion": ["no free gift in the box", "promo not applied", "missing freebie", "sample was not included"],
+    "performance": ["caused a breakout", "irritation on my cheeks", "no visible change", "did not work for me"],
+}
+FILLER = ["", "", "", " 🙂", " !!", " lah", " #shopee", " (2nd purchase)", " ✨", " ..."]
+# 키워드와 겹치지 않는 일상 단어: 실제 리뷰처럼 대부분의 텍스트가 서로 다르게 만듦
+CHATTER = (
+    "bought this for my sister after seeing it on tiktok the bottle is cute smell is mild used it every night "
+    "for two weeks my friend recommended it packaging looks nice size is small texture is light price was ok "
+    "got it during the sale will see how it goes applied before makeup also tried the toner from same line"
+).split()
+
+
+def _product_profiles(rng):
+    # 제품별 (긍정 확률, 부정 확률, 주요 이슈 분포)
+    issue_names = list(ISSUES)
+    profiles = []
+    for _ in PRODUCTS:
+        pos = rng.uniform(0.25, 0.7)
+        neg = rng.uniform(0.15, 1 - pos - 0.05)
+        weights = rng.dirichlet(np.ones(len(issue_names)) * 0.7)
+        profiles.append((pos, neg, weights))
+    return issue_names, profiles
+
+
+def make_synthetic_reviews(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    issue_names, profiles = _product_profiles(rng)
+
+    product_idx = (rng.zipf(1.6, rows) - 1) % len(PRODUCTS)  # 일부 제품에 리뷰가 몰림
+    u = rng.random(rows)
+    pos_p = np.array([p[0] for p in profiles])[product_idx]
+    neg_p = np.array([p[1] for p in profiles])[product_idx]
+    mood = np.where(u < pos_p, 2, np.where(u < pos_p + neg_p, 0, 1))  # 2=긍정, 1=중립, 0=부정
+
+    issue_w = np.array([p[2] for p in profiles])[product_idx]
+    issue_pick = (issue_w.cumsum(axis=1) < rng.random((rows, 1))).sum(axis=1)
+    issue_pick = np.minimum(issue_pick, len(issue_names) - 1)
+
+    pos_i = rng.integers(0, len(POSITIVE), rows)
+    neu_i = rng.integers(0, len(NEUTRAL), rows)
+    neg_i = rng.integers(0, len(NEGATIVE), rows)
+    iss_i = rng.integers(0, 8, rows)
+    fil_i = rng.integers(0, len(FILLER), rows)
+    chat_n = rng.integers(0, 9, rows)
+    chat_w = rng.integers(0, len(CHATTER), (rows, 8))
+    has_issue = (mood == 0) | ((mood == 1) & (rng.random(rows) < 0.5))
+
+    texts = []
+    for k in range(rows):
+        m = mood[k]
+        head = POSITIVE[pos_i[k]] if m == 2 else (NEUTRAL[neu_i[k]] if m == 1 else NEGATIVE[neg_i[k]])
+        if has_issue[k]:
+            phrases = ISSUES[issue_names[issue_pick[k]]]
+            text = f"{head}. {phrases[iss_i[k] % len(phrases)]}"
+        else:
+            text = head
+        chatter = " ".join(CHATTER[w] for w in chat_w[k, :chat_n[k]])
+        texts.append(f"{text}. {chatter}{FILLER[fil_i[k]]}" if chatter else text + FILLER[fil_i[k]])
+
+    # 복사/붙여넣기 중복(약 3%)과 빈 리뷰(약 1%)
+    texts = np.array(texts, dtype=object)
+    dup = rng.random(rows) < 0.03
+    texts[dup] = texts[rng.integers(0, rows, int(dup.sum()))]
+    texts[rng.random(rows) < 0.01] = ""
+
+    rating = np.clip(np.select([mood == 2, mood == 1], [rng.integers(4, 6, rows), rng.integers(3, 5, rows)],
+                               rng.integers(1, 3, rows)), 1, 5)
+    skin = np.array(SKIN_TYPES, dtype=object)[rng.integers(0, len(SKIN_TYPES), rows)]
+    skin[rng.random(rows) < 0.05] = None
+
+    return pd.DataFrame({
+        "review_id": np.char.add("R", np.arange(1, rows + 1).astype(str)),
+        "product_name": np.array(PRODUCTS, dtype=object)[product_idx],
+        "review_text_original": texts,
+        "rating": rating,
+        "country": rng.choice(COUNTRIES, rows, p=COUNTRY_WEIGHTS),
+        "channel": rng.choice(CHANNELS, rows, p=[0.6, 0.4]),
+        "skin_type": skin,
+    })
+
+
+def synthetic_csv_bytes(rows: int, seed: int = 42) -> bytes:
+    return make_synthetic_reviews(rows, seed).to_csv(index=False).encode("utf-8")
+
+
+def synthetic_csv_path(rows: int, seed: int = 42, data_dir: str = None) -> str:
+    """생성한 CSV를 data_dir에 저장해 두고 다음 실행부터 재사용."""
+    data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(synthetic_csv_bytes(rows, seed))
+        os.replace(tmp, path)
+    return path
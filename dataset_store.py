@@ -0,0 +1,152 @@
+import functools
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# 참조하는 세션이 없는 데이터셋을 이 시간(초) 동안 안 쓰면 메모리에서 내림
+DATASET_IDLE_SECONDS = float(os.environ.get("INNIS_DATASET_IDLE_SECONDS", "600"))
+# 참조 없는(idle) 데이터셋이 이 크기를 넘으면 오래된 것부터 바로 내림(참조 중인 데이터셋은 대상 아님)
+DATASET_MAX_IDLE_MB = float(os.environ.get("INNIS_DATASET_MAX_IDLE_MB", "1024"))
+
+
+# ==============================================================================
+# [공유 데이터셋]
+# - 같은 파일(내용 해시)·같은 분석 모델·같은 저장 방식이면 프로세스 전체에서 DataFrame 하나만 보관
+# - 세션들은 같은 객체를 읽기 전용으로 참조(수정 금지: 필요하면 take/copy로 새로 만듦)
+# - 필터/제품/검색 인덱스도 데이터셋에 붙여 처음 만든 세션의 것을 모두 재사용
+# ==============================================================================
+class SharedDataset:
+    def __init__(self, key: str, df: pd.DataFrame, meta: dict = None):
+        self.key = key
+        self.df = df
+        self.meta = meta or {}
+        # memo 키에 쓰는 토큰: 같은 데이터셋을 보는 세션끼리 집계/차트 결과도 공유
+        self.token = uuid.uuid4().hex
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+        self.refs = 0
+        self.last_used = time.time()
+        self._indexes = {}
+        self._index_locks = {}
+        self._lock = threading.Lock()
+
+    def index(self, name: str, build):
+        """이름별 파생 인덱스. 처음 요청한 세션이 build()로 만들고, 동시에 요청한 세션은 기다렸다 공유."""
+        with self._lock:
+            if name in self._indexes:
+                return self._indexes[name]
+            lock = self._index_locks.setdefault(name, threading.Lock())
+        with lock:
+            with self._lock:
+                if name in self._indexes:
+                    return self._indexes[name]
+            value = build()
+            with self._lock:
+                self._indexes[name] = value
+            return value
+
+
+class Lease:
+    """세션이 데이터셋을 쓰는 동안 들고 있는 참조 1개.
+    release()를 부르거나, 세션 상태가 사라져 이 객체가 GC되면 참조 수가 한 번만 줄어듦."""
+
+    def __init__(self, store, dataset: SharedDataset):
+        self.dataset = dataset
+        self._finalizer = weakref.finalize(self, store._release, dataset.key)
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetStore:
+    def __init__(self, idle_seconds: float = DATASET_IDLE_SECONDS,
+                 max_idle_bytes: int = int(DATASET_MAX_IDLE_MB * 1024 * 1024)):
+        self.idle_seconds = idle_seconds
+        self.max_idle_bytes = max_idle_bytes
+        self._items = OrderedDict()  # key -> SharedDataset
+        self._building = {}  # key -> Lock(같은 key를 한 번만 만들도록)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _take(self, key: str):
+        # self._lock 안에서 호출
+        ds = self._items.get(key)
+        if ds is not None:
+            ds.refs += 1
+            ds.last_used = time.time()
+            self._items.move_to_end(key)
+        return ds
+
+    def acquire(self, key: str, build=None):
+        """key 데이터셋의 Lease. 없으면 build() -> (df, meta)로 만들어 등록(build가 없으면 None).
+        여러 세션이 같은 key를 동시에 요청하면 한 세션만 만들고 나머지는 기다렸다가 같은 객체를 받음."""
+        self.evict_idle()
+        with self._lock:
+            ds = self._take(key)
+            if ds is not None:
+                self.hits += 1
+                return Lease(self, ds)
+            if build is None:
+                return None
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                ds = self._take(key)
+                if ds is not None:
+                    self.hits += 1
+                    return Lease(self, ds)
+            # 만드는 동안(파싱/변환)은 전역 잠금 밖: 다른 파일을 여는 세션을 막지 않음
+            df, meta = build()
+            ds = SharedDataset(key, df, meta)
+            with self._lock:
+                self._items[key] = ds
+                self._building.pop(key, None)
+                ds = self._take(key)
+                self.misses += 1
+        return Lease(self, ds)
+
+    def _release(self, key: str):
+        with self._lock:
+            ds = self._items.get(key)
+            if ds is not None:
+                ds.refs = max(0, ds.refs - 1)
+                ds.last_used = time.time()
+        self.evict_idle()
+
+    def evict_idle(self, now: float = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for key in [k for k, ds in self._items.items() if ds.refs == 0 and now - ds.last_used > self.idle_seconds]:
+                del self._items[key]
+            # 오래 안 쓴 순서(OrderedDict 앞쪽)부터
+            idle = [(k, ds.nbytes) for k, ds in self._items.items() if ds.refs == 0]
+            idle_bytes = sum(n for _, n in idle)
+            for key, nbytes in idle:
+                if idle_bytes <= self.max_idle_bytes:
+                    break
+                del self._items[key]
+                idle_bytes -= nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._items.values())
+            return {
+                "datasets": len(items),
+                "refs": sum(ds.refs for ds in items),
+                "bytes": sum(ds.nbytes for ds in items),
+                "idle": sum(1 for ds in items if ds.refs == 0),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@functools.lru_cache(maxsize=1)
+def default_dataset_store():
+    return DatasetStore()
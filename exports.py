@@ -0,0 +1,171 @@
+import functools
+import gzip
+import hashlib
+import io
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from analysis_cache import CACHE_DIR, HAS_PARQUET
+from filter_index import take
+from labels import drop_label_codes
+from profiling import lazy_import
+
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+EXPORT_CACHE_MAX_MB = float(os.environ.get("INNIS_EXPORT_CACHE_MAX_MB", "512"))
+EXPORT_CHUNK_ROWS = 50_000
+
+# 표시 이름 → (확장자, MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_formats():
+    return [f for f in EXPORT_FORMATS if f != "Parquet" or HAS_PARQUET]
+
+
+def export_signature(file_key: str, positions: np.ndarray, fmt: str) -> str:
+    """같은 파일 + 같은 필터 결과(행 위치) + 같은 형식이면 같은 키."""
+    positions = np.ascontiguousarray(positions, dtype=np.int64)
+    h = hashlib.sha256(f"{file_key}|{fmt}|{len(positions)}|".encode("utf-8"))
+    h.update(positions.tobytes())
+    return h.hexdigest()[:24]
+
+
+# ==============================================================================
+# [청크 단위 쓰기]
+# - 필터 결과 전체를 한 번에 문자열로 만들지 않고, EXPORT_CHUNK_ROWS 행씩 꺼내 바로 파일에 씀
+# ==============================================================================
+def iter_export_chunks(df, positions: np.ndarray, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    if len(positions) == 0:
+        yield drop_label_codes(df.iloc[:0])
+        return
+    for start in range(0, len(positions), chunk_rows):
+        yield drop_label_codes(take(df, positions[start:start + chunk_rows]))
+
+
+def write_csv(chunks, f):
+    # 기존 다운로드와 동일하게 utf-8-sig(BOM은 맨 앞 한 번)
+    f.write(b"\xef\xbb\xbf")
+    for i, chunk in enumerate(chunks):
+        f.write(chunk.to_csv(index=False, header=(i == 0)).encode("utf-8"))
+
+
+def write_parquet(chunks, f):
+    # pyarrow.parquet는 Parquet 다운로드를 처음 만들 때 import
+    pa = lazy_import("pyarrow")
+    pq = lazy_import("pyarrow.parquet")
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(f, table.schema, compression="zstd")
+            else:
+                # 청크마다 결측만 있는 컬럼의 타입 추론이 달라지지 않도록 첫 청크 스키마 고정
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(df, positions: np.ndarray, fmt: str, f, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    write_chunks(iter_export_chunks(df, positions, chunk_rows), fmt, f)
+
+
+def write_chunks(chunks, fmt: str, f):
+    """DataFrame 청크들을 형식에 맞게 f에 씀(첫 청크는 비어 있어도 헤더/스키마용으로 필요)."""
+    if fmt == "Parquet":
+        write_parquet(chunks, f)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6, mtime=0) as gz:
+            write_csv(chunks, gz)
+    else:
+        write_csv(chunks, f)
+
+
+# ==============================================================================
+# [내보내기 캐시(디스크, LRU)]
+# - 다운로드 버튼을 누를 때만 생성, 같은 필터 signature면 만들어 둔 파일 재사용
+# ==============================================================================
+class ExportStore:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, signature: str, fmt: str) -> str:
+        return os.path.join(self.root, f"{signature}.{EXPORT_FORMATS[fmt][0]}")
+
+    def get_or_build(self, df, positions: np.ndarray, fmt: str, file_key: str) -> str:
+        path = self._path(export_signature(file_key, positions, fmt), fmt)
+        if os.path.exists(path):
+            try:
+                os.utime(path, None)
+                return path
+            except OSError:
+                pass
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                write_export(df, positions, fmt, f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: str = None):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(e[1] for e in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+@functools.lru_cache(maxsize=1)
+def default_export_store():
+    try:
+        return ExportStore(EXPORT_DIR, EXPORT_CACHE_MAX_MB * 1024 * 1024)
+    except OSError:
+        return None
+
+
+def export_bytes(df, positions: np.ndarray, fmt: str, file_key: str) -> bytes:
+    """다운로드 버튼의 data 콜백: 클릭 시에만 실행(세션 rerun과 별도 스레드)."""
+    store = default_export_store()
+    if store is not None and file_key:
+        try:
+            with open(store.get_or_build(df, positions, fmt, file_key), "rb") as f:
+                return f.read()
+        except OSError:
+            pass
+    buf = io.BytesIO()
+    write_export(df, positions, fmt, buf)
+    return buf.getvalue()
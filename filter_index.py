@@ -0,0 +1,263 @@
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from memory_layout import as_text
+
+
+FILTER_DIMENSIONS = ["country", "channel", "skin_type"]
+
+
+# ==============================================================================
+# [비트맵 필터 인덱스]
+# - 데이터셋마다 한 번 생성: 차원(국가/채널/피부타입)의 값마다 비트셋, 평점은 정렬 배열
+# - 필터 조합 = 비트셋 AND 몇 번 → 행 위치 배열
+# ==============================================================================
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, dimensions=FILTER_DIMENSIONS):
+        self.n_rows = len(df)
+        self.options = {}
+        self._bitsets = {}
+        self._all = np.packbits(np.ones(self.n_rows, dtype=bool))
+
+        for dim in dimensions:
+            if dim not in df.columns:
+                self.options[dim] = []
+                self._bitsets[dim] = {}
+                continue
+            col = df[dim]
+            # 기존 필터와 동일하게 astype(str) 값으로 비교(결측은 어떤 값에도 매칭되지 않음)
+            codes, uniques = pd.factorize(col)
+            values = [str(u) for u in uniques]
+            bitsets = {}
+            for code, value in enumerate(values):
+                mask = codes == code
+                prev = bitsets.get(value)
+                bitsets[value] = np.packbits(mask) if prev is None else (prev | np.packbits(mask))
+            self._bitsets[dim] = bitsets
+            self.options[dim] = sorted(v for v in bitsets if v.strip())
+
+        if "rating" in df.columns:
+            rating = pd.to_numeric(df["rating"], errors="coerce").to_numpy(dtype=float)
+        else:
+            rating = np.full(self.n_rows, np.nan)
+        has_rating = ~np.isnan(rating)
+        self._rating_notna = np.packbits(has_rating)
+        valid_pos = np.flatnonzero(has_rating)
+        order = np.argsort(rating[valid_pos], kind="stable")
+        self._rating_sorted = rating[valid_pos][order]
+        self._rating_pos = valid_pos[order]
+
+    def _to_bits(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def rating_bits(self, rmin, rmax) -> np.ndarray:
+        lo = np.searchsorted(self._rating_sorted, rmin, side="left")
+        hi = np.searchsorted(self._rating_sorted, rmax, side="right")
+        return self._to_bits(self._rating_pos[lo:hi])
+
+    def select_bits(self, selections: dict = None, rating_range=None) -> np.ndarray:
+        """selections: {차원: 값 or None}. None/미지정 차원은 전체."""
+        bits = self._all.copy()
+        for dim, value in (selections or {}).items():
+            if value is None:
+                continue
+            value_bits = self._bitsets.get(dim, {}).get(str(value))
+            if value_bits is None:
+                return np.zeros_like(bits)
+            bits &= value_bits
+
+        # 기존 동작 유지: 현재 선택 범위에 평점 값이 하나라도 있을 때만 평점 필터 적용
+        if rating_range is not None and (bits & self._rating_notna).any():
+            bits &= self.rating_bits(*rating_range)
+        return bits
+
+    def positions(self, bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def select(self, selections: dict = None, rating_range=None) -> np.ndarray:
+        return self.positions(self.select_bits(selections, rating_range))
+
+
+# ==============================================================================
+# [그룹 인덱스 / 부분 추출]
+# - 기준 DataFrame은 세션에 하나만 두고(복사 없음), 화면 단계마다 행 위치 배열만 넘김
+# - 그룹 목록/그룹별 위치는 코드 배열로 계산, 실제로 그릴 행·컬럼만 take로 꺼냄
+# ==============================================================================
+class GroupIndex:
+    """컬럼 값 → 정렬된 라벨 코드(결측은 fill 라벨)."""
+
+    def __init__(self, values: pd.Series, fill: str = "Unknown"):
+        codes, uniques = pd.factorize(values)
+        raw_labels = [str(u) for u in uniques] + [fill]
+        self.labels = sorted(set(raw_labels))
+        self._lookup = {label: i for i, label in enumerate(self.labels)}
+        table = np.array([self._lookup[label] for label in raw_labels], dtype=np.int32)
+        self.codes = table[codes]  # codes == -1(결측) → fill 라벨
+
+    def labels_at(self, positions: np.ndarray):
+        return [self.labels[i] for i in np.unique(self.codes[positions])]
+
+    def positions_of(self, positions: np.ndarray, label) -> np.ndarray:
+        code = self._lookup.get(str(label))
+        if code is None:
+            return positions[:0]
+        return positions[self.codes[positions] == code]
+
+    def positions_in(self, positions: np.ndarray, labels) -> np.ndarray:
+        codes = [self._lookup[str(label)] for label in labels if str(label) in self._lookup]
+        return positions[np.isin(self.codes[positions], codes)]
+
+    def counts(self, positions: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+        """라벨별 행 수(weights가 있으면 합). 길이 = len(labels)."""
+        w = None if weights is None else weights[positions]
+        return np.bincount(self.codes[positions], weights=w, minlength=len(self.labels))
+
+
+def take(df: pd.DataFrame, positions: np.ndarray, columns=None) -> pd.DataFrame:
+    """positions 행 × columns 컬럼만 새로 만든 작은 DataFrame(기준 df는 그대로)."""
+    if columns is None:
+        return df.iloc[positions]
+    return df.iloc[positions, [df.columns.get_loc(c) for c in columns if c in df.columns]]
+
+
+# ==============================================================================
+# [역색인 검색(리뷰/이슈/갭)]
+# - 첫 검색 때 생성(lazy), 데이터셋별로 재사용
+# - 일반 질의: 기존 부분 문자열 검색과 같은 결과(인덱스는 후보만 좁힘)
+# - "deliv*"처럼 끝에 *를 붙인 단어가 있으면 공백으로 나눈 단어들의 AND(* 단어는 접두어)
+# ==============================================================================
+SEARCH_COLUMNS = ["review_text_original", "issue_detail", "gap_type"]
+TOKEN_RE = re.compile(r"\w+")
+SEARCH_MEMO_ITEMS = 256
+
+
+def tokenize(text: str):
+    # casefold: 대소문자 무시 부분 문자열 검색(re.IGNORECASE)이 같게 보는 문자(ſ/s 등)도 같은 토큰으로
+    return TOKEN_RE.findall(str(text).casefold())
+
+
+class TextSearchIndex:
+    def __init__(self, df: pd.DataFrame, columns=SEARCH_COLUMNS):
+        self.n_rows = len(df)
+        self._columns = []
+        # 인덱스는 공유 데이터셋을 통해 여러 세션이 같이 쓰므로 memo 읽기/쓰기는 잠금 안에서
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        vocab = set()
+        for col in columns:
+            if col not in df.columns:
+                continue
+            # 같은 텍스트는 한 번만 토큰화(행 → 고유 텍스트 코드로 연결)
+            codes, uniques = pd.factorize(as_text(df[col]))
+            postings = {}
+            for uid, text in enumerate(uniques):
+                for tok in set(tokenize(text)):
+                    postings.setdefault(tok, []).append(uid)
+            vocab.update(postings)
+            self._columns.append((codes, len(uniques), postings))
+        self._vocab = np.array(sorted(vocab), dtype=object)
+        self._vocab_s = pd.Series(self._vocab, dtype=object)
+
+    def _rows_for_tokens(self, memo_key: str, tokens) -> np.ndarray:
+        with self._memo_lock:
+            hit = self._memo.get(memo_key)
+            if hit is not None:
+                self._memo.move_to_end(memo_key)
+                return hit
+
+        # 토큰들의 posting(고유 텍스트 코드)을 합친 뒤, 행 코드 배열로 한 번에 펼침
+        row_mask = np.zeros(self.n_rows, dtype=bool)
+        for codes, n_uniques, postings in self._columns:
+            uniq_mask = np.zeros(n_uniques, dtype=bool)
+            found = False
+            for tok in tokens:
+                uids = postings.get(tok)
+                if uids:
+                    uniq_mask[uids] = True
+                    found = True
+            if found:
+                row_mask |= uniq_mask[codes]
+        rows = np.flatnonzero(row_mask)
+
+        with self._memo_lock:
+            self._memo[memo_key] = rows
+            self._memo.move_to_end(memo_key)
+            while len(self._memo) > SEARCH_MEMO_ITEMS:
+                self._memo.popitem(last=False)
+        return rows
+
+    def _prefix_tokens(self, prefix: str):
+        lo = np.searchsorted(self._vocab, prefix, side="left")
+        hi = np.searchsorted(self._vocab, prefix + "\U0010ffff", side="left")
+        return self._vocab[lo:hi]
+
+    def _infix_tokens(self, part: str):
+        # 어휘(고유 토큰) 수만큼만 검사: 행 수와 무관
+        return self._vocab[self._vocab_s.str.contains(part, regex=False).to_numpy(dtype=bool)]
+
+    def term(self, tok: str) -> np.ndarray:
+        tok = tok.casefold()
+        return self._rows_for_tokens(tok, [tok])
+
+    def prefix(self, prefix: str) -> np.ndarray:
+        prefix = prefix.casefold()
+        return self._rows_for_tokens(prefix + "*", self._prefix_tokens(prefix))
+
+    def contains(self, part: str) -> np.ndarray:
+        """part를 부분 문자열로 포함하는 토큰이 있는 행."""
+        part = part.casefold()
+        return self._rows_for_tokens("~" + part, self._infix_tokens(part))
+
+    def search(self, query: str):
+        """질의 → (행 위치 배열, exact). 인덱스로 답할 수 없는 질의(구두점 포함 등)면 (None, False).
+
+        - "deliv*"처럼 *가 붙은 단어가 있으면 단어별 AND 검색(접두어/부분 문자열)이고 결과가 최종(exact=True)
+        - 그 외에는 기존 부분 문자열 검색의 후보(상위 집합)만 반환(exact=False):
+          질의 안의 단어는 모두 원문의 어떤 토큰 안에 들어 있으므로, 단어마다 그 단어를 포함하는 토큰이 있는 행의 AND
+        """
+        words = str(query).casefold().split()
+        if not words:
+            return None, False
+        exact = any(w.endswith("*") and len(w) > 1 for w in words)
+        result = None
+        for word in words:
+            is_prefix = word.endswith("*") and len(word) > 1
+            core = word[:-1] if is_prefix else word
+            if TOKEN_RE.fullmatch(core) is None:
+                return None, False
+            rows = self.prefix(core) if is_prefix else self.contains(core)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if result.size == 0:
+                break
+        return result, exact
+
+
+def substring_mask(df: pd.DataFrame, positions: np.ndarray, query: str, columns=SEARCH_COLUMNS) -> np.ndarray:
+    """기존 검색: positions 행 중 검색 컬럼 어디든 질의 문자열을 포함하면 True(대소문자 무시)."""
+    pat = re.escape(query)
+    search_df = take(df, positions, [c for c in columns if c in df.columns])
+    mask = np.zeros(len(positions), dtype=bool)
+    for col in search_df.columns:
+        mask |= as_text(search_df[col]).str.contains(pat, case=False, na=False).to_numpy()
+    return mask
+
+
+def search_positions(df: pd.DataFrame, index: TextSearchIndex, positions: np.ndarray, query: str) -> np.ndarray:
+    """positions 중 검색어에 맞는 행. *가 없는 질의는 기존 부분 문자열 검색과 결과가 같음:
+    역색인으로 후보를 좁히고 후보에만 부분 문자열 검사. 인덱스로 못 다루는 질의는 전체 부분 문자열 검색."""
+    query = str(query).strip()
+    if not query:
+        return positions
+    hits, exact = index.search(query)
+    if hits is None:
+        return positions[substring_mask(df, positions, query)]
+    positions = np.intersect1d(positions, hits, assume_unique=True)
+    if exact:
+        return positions
+    return positions[substring_mask(df, positions, query)]
@@ -0,0 +1,160 @@
+import functools
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import CACHE_DIR, HAS_PARQUET
+from analysis_engine import ANALYSIS_COLUMNS, FALLBACK_COLUMN
+from memory_layout import as_text
+
+
+# 파일에 이 컬럼들이 모두 있으면 "키 모드"(같은 키 + 같은 텍스트만 재사용),
+# 없으면 "텍스트 모드"(같은 리뷰 텍스트면 재사용)
+DELTA_KEY_COLUMNS = ["review_id"]
+DELTA_MAX_ROWS = int(os.environ.get("INNIS_DELTA_MAX_ROWS", "5000000"))
+
+SNAPSHOT_COLUMNS = ["key_fp", "content_fp"] + ANALYSIS_COLUMNS
+
+
+# ==============================================================================
+# [행 지문]
+# ==============================================================================
+def _hash_columns(df: pd.DataFrame, cols) -> np.ndarray:
+    # 내보내기마다 dtype이 달라질 수 있으므로 문자열 기준으로 해시
+    frame = pd.DataFrame({c: as_text(df[c]).to_numpy() for c in cols})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def row_fingerprints(df: pd.DataFrame, key_columns=DELTA_KEY_COLUMNS, text_col: str = "review_text_original"):
+    """(key 지문, 내용 지문, 모드) 반환."""
+    content_fp = _hash_columns(df, [text_col])
+    if key_columns and all(c in df.columns for c in key_columns):
+        return _hash_columns(df, list(key_columns)), content_fp, "key"
+    return content_fp, content_fp, "text"
+
+
+# ==============================================================================
+# [증분 분석]
+# ==============================================================================
+def split_fallback(df: pd.DataFrame):
+    """analyze 결과에서 FALLBACK_COLUMN을 떼어 낸 DataFrame과 규칙 기반으로 대체된 행 수."""
+    if FALLBACK_COLUMN not in df.columns:
+        return df, 0
+    return df.drop(columns=FALLBACK_COLUMN), int(df[FALLBACK_COLUMN].to_numpy(dtype=bool).sum())
+
+
+def apply_incremental_analysis(df: pd.DataFrame, analyze, previous: pd.DataFrame = None,
+                               key_columns=DELTA_KEY_COLUMNS):
+    """이전 스냅샷에서 재사용 가능한 행은 결과를 가져오고, 신규/변경 행만 analyze(sub_df)로 분석.
+    analyze 결과의 FALLBACK_COLUMN이 True인 행(규칙 기반으로 대체)은 스냅샷에 넣지 않아 다음에 다시 분석.
+
+    반환: (분석된 DataFrame, 새 스냅샷, 통계 dict)
+    """
+    key_fp, content_fp, mode = row_fingerprints(df, key_columns)
+    n = len(df)
+
+    pos = np.full(n, -1, dtype=np.int64)
+    if previous is not None and not previous.empty:
+        prev = previous.drop_duplicates("key_fp", keep="last").reset_index(drop=True)
+        pos = pd.Index(prev["key_fp"].to_numpy(dtype=np.uint64)).get_indexer(key_fp)
+        found = pos >= 0
+        same_content = np.zeros(n, dtype=bool)
+        same_content[found] = prev["content_fp"].to_numpy(dtype=np.uint64)[pos[found]] == content_fp[found]
+    else:
+        prev = None
+        found = np.zeros(n, dtype=bool)
+        same_content = found
+
+    reuse = found & same_content
+    changed = found & ~same_content
+    todo = ~reuse
+
+    out = df.copy()
+    for col in ANALYSIS_COLUMNS:
+        values = np.empty(n, dtype=object)
+        if prev is not None and reuse.any():
+            values[reuse] = prev[col].to_numpy(dtype=object)[pos[reuse]]
+        out[col] = values
+
+    fallback = np.zeros(n, dtype=bool)
+    if todo.any():
+        fresh = analyze(df.iloc[np.flatnonzero(todo)])
+        for col in ANALYSIS_COLUMNS:
+            values = out[col].to_numpy(dtype=object, copy=True)
+            values[todo] = fresh[col].to_numpy(dtype=object)
+            out[col] = values
+        if FALLBACK_COLUMN in fresh.columns:
+            fallback[todo] = fresh[FALLBACK_COLUMN].to_numpy(dtype=bool)
+
+    keep = ~fallback
+    snapshot = pd.DataFrame({"key_fp": key_fp[keep], "content_fp": content_fp[keep],
+                             **{c: out[c].to_numpy(dtype=object)[keep] for c in ANALYSIS_COLUMNS}})
+    if prev is not None:
+        # 이번 파일에 없는 과거 행도 남겨 두되, 최근 것 우선으로 상한 유지
+        older = prev[~prev["key_fp"].isin(snapshot["key_fp"])]
+        snapshot = pd.concat([older[SNAPSHOT_COLUMNS], snapshot], ignore_index=True)
+    if len(snapshot) > DELTA_MAX_ROWS:
+        snapshot = snapshot.iloc[-DELTA_MAX_ROWS:].reset_index(drop=True)
+
+    stats = {
+        "mode": mode,
+        "rows": n,
+        "reused": int(reuse.sum()),
+        "changed": int(changed.sum()),
+        "new": int((~found).sum()),
+        "analyzed": int(todo.sum()),
+        "fallback": int(fallback.sum()),
+    }
+    return out, snapshot, stats
+
+
+# ==============================================================================
+# [스냅샷 저장소]
+# ==============================================================================
+class DeltaSnapshotStore:
+    """규칙/모델 버전별로 마지막 분석 스냅샷(지문 + 분석 결과)을 Parquet로 보관."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.root, f"{version}.parquet")
+
+    def load(self, version: str):
+        path = self._path(version)
+        if not os.path.exists(path):
+            return None
+        try:
+            snap = pd.read_parquet(path)
+        except Exception:
+            return None
+        if list(snap.columns) != SNAPSHOT_COLUMNS:
+            return None
+        return snap
+
+    def save(self, version: str, snapshot: pd.DataFrame) -> bool:
+        path = self._path(version)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            snapshot[SNAPSHOT_COLUMNS].to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            return True
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+
+
+@functools.lru_cache(maxsize=1)
+def default_snapshot_store():
+    if not HAS_PARQUET:
+        return None
+    try:
+        return DeltaSnapshotStore(os.path.join(CACHE_DIR, "delta"))
+    except OSError:
+        return None
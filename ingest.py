@@ -0,0 +1,186 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+# ✅ pyarrow가 없으면 pandas C 엔진으로 동작
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except Exception:
+    pa = None
+    pa_csv = None
+
+
+# ==============================================================================
+# [컬럼 규격]
+# ==============================================================================
+RENAME_MAP = {
+    "상품명": "product_name",
+    "product": "product_name",
+    "리뷰": "review_text_original",
+    "gap_detail": "issue_detail",
+    "VoB": "vob_text",
+    "별점": "rating",
+    "국가": "country",
+    "피부타입": "skin_type",
+}
+
+OPTIONAL_COLUMNS = ["issue_detail", "vob_text", "gap_type", "sentiment", "recommended_copy",
+                    "country", "skin_type", "channel", "rating"]
+
+# 타입 추론을 건너뛰도록 미리 지정하는 컬럼(원본/표준 이름 모두)
+TEXT_COLUMNS = {"product_name", "review_text_original", "issue_detail", "vob_text", "gap_type", "sentiment",
+                "recommended_copy", "country", "skin_type", "channel"}
+NUMERIC_COLUMNS = {"rating"}
+
+SNIFF_BYTES = 64 * 1024
+SNIFF_LINES = 20
+CANDIDATE_ENCODINGS = ["utf-8-sig", "cp949", "latin-1"]
+CANDIDATE_DELIMITERS = ",\t;|"
+
+
+# ==============================================================================
+# [포맷 감지]
+# ==============================================================================
+def _decode_prefix(prefix: bytes):
+    # 앞부분만 잘랐기 때문에 마지막 줄(멀티바이트 문자가 잘렸을 수 있음)은 버리고 판정
+    cut = prefix.rfind(b"\n")
+    body = prefix[:cut] if cut > 0 else prefix
+    for enc in CANDIDATE_ENCODINGS:
+        try:
+            return enc, body.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return "latin-1", body.decode("latin-1")
+
+
+def sniff_csv_format(prefix: bytes):
+    """파일 앞부분만 보고 (encoding, delimiter, header 컬럼 목록)을 추정."""
+    encoding, sample = _decode_prefix(prefix)
+    head_lines = "\n".join(sample.split("\n", SNIFF_LINES)[:SNIFF_LINES])
+    try:
+        delimiter = csv.Sniffer().sniff(head_lines, delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        first_line = sample.split("\n", 1)[0]
+        delimiter = "\t" if first_line.count("\t") > first_line.count(",") else ","
+
+    try:
+        header = next(csv.reader(io.StringIO(sample), delimiter=delimiter))
+    except StopIteration:
+        header = []
+
+    # ✅ 헤더가 통째로 한 컬럼인데 탭이 들어 있으면 탭 구분으로 간주(기존 방어 로직 유지)
+    if len(header) == 1 and "\t" in header[0]:
+        delimiter = "\t"
+        header = header[0].split("\t")
+    return encoding, delimiter, header
+
+
+def _known_dtypes(header):
+    text_names = TEXT_COLUMNS | {k for k, v in RENAME_MAP.items() if v in TEXT_COLUMNS}
+    num_names = NUMERIC_COLUMNS | {k for k, v in RENAME_MAP.items() if v in NUMERIC_COLUMNS}
+    text = [h for h in header if h in text_names]
+    num = [h for h in header if h in num_names]
+    return text, num
+
+
+# ==============================================================================
+# [파싱]
+# ==============================================================================
+def _read_with_pyarrow(raw, encoding, delimiter, text_cols, num_cols):
+    def _read(column_types):
+        table = pa_csv.read_csv(
+            pa.BufferReader(raw),
+            read_options=pa_csv.ReadOptions(encoding=encoding),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter, newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+        )
+        return table.to_pandas()
+
+    types = {c: pa.string() for c in text_cols}
+    try:
+        return _read({**types, **{c: pa.float64() for c in num_cols}})
+    except pa.ArrowInvalid:
+        # 평점 컬럼에 숫자가 아닌 값이 섞인 경우 → 문자열로 읽고 이후 to_numeric(coerce)
+        return _read({**types, **{c: pa.string() for c in num_cols}})
+
+
+def _read_with_c_engine(raw, encoding, delimiter, text_cols, num_cols):
+    def _read(dtype):
+        return pd.read_csv(io.BytesIO(raw), sep=delimiter, encoding=encoding, engine="c", dtype=dtype,
+                           low_memory=False)
+
+    types = {c: str for c in text_cols}
+    try:
+        return _read({**types, **{c: "float64" for c in num_cols}})
+    except ValueError:
+        return _read({**types, **{c: str for c in num_cols}})
+
+
+def read_upload_bytes(file) -> bytes:
+    file.seek(0)
+    raw = file.read()
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    return raw
+
+
+def read_reviews_csv(file) -> pd.DataFrame:
+    """업로드 파일을 한 번만 읽어 파싱. 구분자/인코딩은 앞부분(SNIFF_BYTES)으로만 판정."""
+    return parse_reviews_bytes(read_upload_bytes(file))
+
+
+def parse_reviews_bytes(raw: bytes) -> pd.DataFrame:
+    encoding, delimiter, header = sniff_csv_format(raw[:SNIFF_BYTES])
+    text_cols, num_cols = _known_dtypes(header)
+
+    # 중복 헤더는 pandas의 이름 변경 규칙(a, a.1 ...)을 따르도록 C 엔진 사용
+    if pa_csv is not None and len(set(header)) == len(header):
+        try:
+            return _read_with_pyarrow(raw, encoding, delimiter, text_cols, num_cols)
+        except pa.ArrowInvalid:
+            pass
+    return _read_with_c_engine(raw, encoding, delimiter, text_cols, num_cols)
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={k: v for k, v in RENAME_MAP.items() if k in df.columns})
+
+    if "product_name" not in df.columns:
+        df["product_name"] = "Default Product"
+    if "review_text_original" not in df.columns:
+        df["review_text_original"] = ""
+
+    for col in OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+
+    if df["rating"].notna().any():
+        df["rating"] = pd.to_numeric(df["rating"], errors="coerce")
+    return df
+
+
+# ==============================================================================
+# [스트리밍 파싱(대용량 파일)]
+# - 파일 전체를 메모리에 올리지 않고 chunk_rows 행씩 읽어 컬럼 정리까지 한 DataFrame을 내보냄
+# - 구분자/인코딩 판정은 parse_reviews_bytes와 동일(앞부분 SNIFF_BYTES)
+# ==============================================================================
+def iter_reviews_csv(source, chunk_rows: int = 100_000):
+    """source: 파일 경로 또는 바이너리 파일 객체. 평점은 청크마다 to_numeric(coerce)."""
+    f = open(source, "rb") if isinstance(source, str) or hasattr(source, "__fspath__") else source
+    try:
+        f.seek(0)
+        encoding, delimiter, header = sniff_csv_format(f.read(SNIFF_BYTES))
+        f.seek(0)
+        text_cols, num_cols = _known_dtypes(header)
+        reader = pd.read_csv(f, sep=delimiter, encoding=encoding, engine="c", chunksize=chunk_rows,
+                             dtype={c: str for c in text_cols + num_cols}, low_memory=False)
+        for chunk in reader:
+            chunk = normalize_columns(chunk)
+            chunk["rating"] = pd.to_numeric(chunk["rating"], errors="coerce")
+            yield chunk
+    finally:
+        if f is not source:
+            f.close()
@@ -0,0 +1,254 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import CACHE_DIR, HAS_PARQUET
+from analysis_engine import ANALYSIS_COLUMNS, FALLBACK_COLUMN
+from memory_layout import as_text
+
+
+JOB_DIR = os.path.join(CACHE_DIR, "jobs")
+JOB_CHUNK_ROWS = 50_000
+JOB_CHUNK_ROWS_LLM = 500
+JOB_POLL_SECONDS = 1.0
+JOB_WORKERS = int(os.environ.get("INNIS_JOB_WORKERS", "1"))
+JOB_KEEP_FINISHED = 4
+JOB_CHECKPOINT_TTL = 7 * 24 * 3600
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# ==============================================================================
+# [청크 체크포인트]
+# - 작업 키별 디렉터리에 완료된 청크의 분석 4개 컬럼만 Parquet로 저장
+# - manifest의 signature(대상 행 텍스트 지문 + 청크 크기)가 다르면 이전 청크는 버림
+# ==============================================================================
+def chunk_signature(df: pd.DataFrame, chunk_size: int, text_col: str = "review_text_original") -> str:
+    texts = as_text(df[text_col]) if text_col in df.columns else pd.Series([""] * len(df))
+    h = hashlib.sha256(f"{len(df)}:{chunk_size}:".encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(texts, index=False).to_numpy(dtype=np.uint64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def part_columns(part: pd.DataFrame) -> list:
+    """청크 결과에서 보관할 컬럼: 분석 4개 + (있으면) 규칙 기반 대체 표시."""
+    return ANALYSIS_COLUMNS + ([FALLBACK_COLUMN] if FALLBACK_COLUMN in part.columns else [])
+
+
+class ChunkCheckpoint:
+    def __init__(self, root: str, job_key: str, signature: str):
+        self.dir = os.path.join(root, job_key)
+        self.signature = signature
+        os.makedirs(self.dir, exist_ok=True)
+        manifest = os.path.join(self.dir, "manifest.json")
+        try:
+            with open(manifest, "r", encoding="utf-8") as f:
+                same = json.load(f).get("signature") == signature
+        except (OSError, ValueError):
+            same = False
+        if not same:
+            self.clear()
+            os.makedirs(self.dir, exist_ok=True)
+            with open(manifest, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "created": time.time()}, f)
+
+    def _path(self, i: int) -> str:
+        return os.path.join(self.dir, f"chunk_{i:06d}.parquet")
+
+    def load(self, i: int, expected_rows: int):
+        path = self._path(i)
+        if not os.path.exists(path):
+            return None
+        try:
+            part = pd.read_parquet(path)
+        except Exception:
+            return None
+        if len(part) != expected_rows or list(part.columns) != part_columns(part):
+            return None
+        return part
+
+    def save(self, i: int, part: pd.DataFrame):
+        path = self._path(i)
+        tmp = f"{path}.tmp"
+        try:
+            part[part_columns(part)].reset_index(drop=True).to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prune_checkpoints(root: str = JOB_DIR, max_age: float = JOB_CHECKPOINT_TTL):
+    """취소/중단된 뒤 다시 실행되지 않은 오래된 체크포인트 정리."""
+    if not os.path.isdir(root):
+        return
+    now = time.time()
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+# ==============================================================================
+# [작업]
+# - 진행 상태는 속성만 갱신(저렴), UI는 주기적으로 progress()를 읽어 표시 → 갱신 빈도는 UI 쪽에서 제한
+# ==============================================================================
+class AnalysisJob:
+    def __init__(self, key: str):
+        self.key = key
+        self.status = QUEUED
+        self.total = 0
+        self.done = 0
+        self.resumed = 0
+        self.result = None
+        self.stats = {}
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        # 체크포인트에서 복원한 행은 속도 계산에서 제외
+        processed = max(0, self.done - self.resumed)
+        rows_per_sec = processed / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        eta = remaining / rows_per_sec if rows_per_sec > 0 else None
+        return {"status": self.status, "done": self.done, "total": self.total, "resumed": self.resumed,
+                "elapsed": elapsed, "rows_per_sec": rows_per_sec, "eta": eta}
+
+
+def run_chunked(df: pd.DataFrame, analyze, job: AnalysisJob, checkpoint: ChunkCheckpoint = None,
+                chunk_size: int = JOB_CHUNK_ROWS) -> pd.DataFrame:
+    """df를 청크 단위로 analyze(chunk_df, on_progress)에 넘김. 체크포인트에 있는 청크는 건너뛰고,
+    청크 사이마다 취소 여부를 확인. 분석 4개 컬럼이 채워진 새 DataFrame 반환
+    (청크 결과에 FALLBACK_COLUMN이 있으면 그것도 이어 붙임)."""
+    n = len(df)
+    job.total = n
+    job.done = 0
+    parts = []
+    for i, start in enumerate(range(0, n, chunk_size)):
+        job.raise_if_cancelled()
+        chunk = df.iloc[start:start + chunk_size]
+        part = checkpoint.load(i, len(chunk)) if checkpoint is not None else None
+        if part is None:
+            def _report(done, _total, base=start):
+                job.done = base + done
+
+            part = analyze(chunk, _report)
+            part = part[part_columns(part)]
+            if checkpoint is not None:
+                checkpoint.save(i, part)
+        else:
+            job.resumed += len(chunk)
+        parts.append(part)
+        job.done = start + len(chunk)
+
+    out = df.copy()
+    for col in ANALYSIS_COLUMNS:
+        out[col] = np.concatenate([p[col].to_numpy(dtype=object) for p in parts]) if parts else np.empty(0, object)
+    if any(FALLBACK_COLUMN in p.columns for p in parts):
+        out[FALLBACK_COLUMN] = np.concatenate([
+            p[FALLBACK_COLUMN].to_numpy(dtype=bool) if FALLBACK_COLUMN in p.columns else np.zeros(len(p), bool)
+            for p in parts
+        ])
+    return out
+
+
+# ==============================================================================
+# [작업 관리자]
+# - 프로세스 전역(세션/재실행과 무관하게 계속 실행), 같은 키의 작업이 진행 중이면 그 작업을 반환
+# - 새로고침 후 같은 파일을 다시 올리면 같은 키로 진행 중/완료된 작업에 다시 연결됨
+# ==============================================================================
+class JobManager:
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="innis-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key: str, fn) -> AnalysisJob:
+        """fn(job) -> 결과. 같은 키의 작업이 대기/실행 중이면 새로 만들지 않음."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status in ACTIVE_STATES:
+                return job
+            job = AnalysisJob(key)
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._trim()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _trim(self):
+        finished = [k for k, j in self._jobs.items() if j.status not in ACTIVE_STATES]
+        for k in finished[:max(0, len(finished) - JOB_KEEP_FINISHED)]:
+            del self._jobs[k]
+
+    def _run(self, job: AnalysisJob, fn):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.raise_if_cancelled()
+            job.result = fn(job)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+
+@functools.lru_cache(maxsize=1)
+def default_job_manager() -> JobManager:
+    prune_checkpoints()
+    return JobManager()
+
+
+def checkpoint_for(job_key: str, df: pd.DataFrame, chunk_size: int):
+    if not HAS_PARQUET:
+        return None
+    try:
+        return ChunkCheckpoint(JOB_DIR, job_key, chunk_signature(df, chunk_size))
+    except OSError:
+        return None
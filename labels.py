@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================================================================
+# [한글 매핑]
+# ==============================================================================
+GAP_KO_MAP = {
+    "Product Performance": "성능 불일치",
+    "Product Quality": "제품 품질 이슈",
+    "Texture": "제형·사용감 불일치",
+    "Usage": "제형·사용감 불일치",
+    "Suitability": "피부 타입 적합성 이슈",
+    "Service": "서비스/CS 이슈",
+    "Delivery": "배송 이슈",
+    "Logistics": "배송 이슈",
+    "Promotion": "프로모션/사은품 문제",
+    "Freebies": "프로모션/사은품 문제",
+    "No Gap": "문제 없음"
+}
+
+
+def get_gap_ko(gap_en):
+    gap_str = str(gap_en)
+    if gap_str in ["nan", "None", ""]:
+        return "정보 없음"
+    for key, val in GAP_KO_MAP.items():
+        if key.lower() in gap_str.lower():
+            return f"{val} ({key})"
+    return gap_str
+
+
+# ==============================================================================
+# [라벨 코드]
+# - sentiment_code: 비트 플래그(SENT_POS | SENT_NEG). 기존 "Positive|Pos", "Negative|Neg" 부분일치와 동일
+# - gap_code: GAP_MISSING(결측) / GAP_NO_GAP("No Gap" 포함) / 그 외 GAP_KO_MAP 키 순서 + 1 / GAP_OTHER
+# - gap_type_ko: get_gap_ko 결과(카테고리형)
+# ==============================================================================
+SENT_POS = 1
+SENT_NEG = 2
+
+GAP_MISSING = -1
+GAP_NO_GAP = 0
+GAP_KEYS = [k for k in GAP_KO_MAP if k != "No Gap"]
+GAP_OTHER = len(GAP_KEYS) + 1
+
+LABEL_CODE_COLUMNS = ["sentiment_code", "gap_code", "gap_type_ko"]
+
+
+def _sentiment_code(label) -> int:
+    s = str(label).lower()
+    return (SENT_POS if "pos" in s else 0) | (SENT_NEG if "neg" in s else 0)
+
+
+def _gap_code(label) -> int:
+    s = str(label).lower()
+    if "no gap" in s:
+        return GAP_NO_GAP
+    for i, key in enumerate(GAP_KEYS, start=1):
+        if key.lower() in s:
+            return i
+    return GAP_OTHER
+
+
+def _codes_per_unique(values: pd.Series, fn, missing_code):
+    """고유값마다 한 번만 fn을 계산하고 코드 배열로 펼침."""
+    codes, uniques = pd.factorize(values)
+    table = np.array([fn(u) for u in uniques] + [missing_code], dtype=np.int8)
+    return table[codes]  # codes == -1(결측) → 마지막 칸(missing_code)
+
+
+def add_label_codes(df: pd.DataFrame) -> pd.DataFrame:
+    """sentiment/gap_type을 정수 코드 + 한글 라벨 컬럼으로 한 번에 정규화(원본 컬럼은 유지)."""
+    out = df.copy()
+    out["sentiment_code"] = _codes_per_unique(out["sentiment"], _sentiment_code, 0)
+    out["gap_code"] = _codes_per_unique(out["gap_type"], _gap_code, GAP_MISSING)
+
+    codes, uniques = pd.factorize(out["gap_type"])
+    ko = [get_gap_ko(u) for u in uniques]
+    categories = list(dict.fromkeys(ko + [get_gap_ko(np.nan)]))
+    ko_codes = np.array([categories.index(k) for k in ko] + [categories.index(get_gap_ko(np.nan))], dtype=np.int16)
+    out["gap_type_ko"] = pd.Categorical.from_codes(ko_codes[codes], categories=categories)
+    return out
+
+
+def ensure_label_codes(df: pd.DataFrame) -> pd.DataFrame:
+    if all(c in df.columns for c in LABEL_CODE_COLUMNS):
+        return df
+    return add_label_codes(df)
+
+
+def drop_label_codes(df: pd.DataFrame) -> pd.DataFrame:
+    """내보내기용: 파생 코드 컬럼 제거."""
+    return df.drop(columns=[c for c in LABEL_CODE_COLUMNS if c in df.columns])
+
+
+def is_positive(df: pd.DataFrame) -> np.ndarray:
+    return (df["sentiment_code"].to_numpy() & SENT_POS) != 0
+
+
+def is_negative(df: pd.DataFrame) -> np.ndarray:
+    return (df["sentiment_code"].to_numpy() & SENT_NEG) != 0
+
+
+def is_no_gap(df: pd.DataFrame) -> np.ndarray:
+    return df["gap_code"].to_numpy() == GAP_NO_GAP
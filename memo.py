@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+MEMO_MAX_ITEMS = int(os.environ.get("INNIS_MEMO_MAX_ITEMS", "256"))
+MEMO_MAX_MB = float(os.environ.get("INNIS_MEMO_MAX_MB", "128"))
+
+
+def fingerprint(*parts) -> str:
+    """행 위치 배열/파라미터 → 짧은 키. 배열은 dtype·shape·바이트 전체를 해시(1M행 int64도 수 ms)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            arr = np.ascontiguousarray(part)
+            h.update(f"nd:{arr.dtype.str}:{arr.shape}|".encode("utf-8"))
+            h.update(arr.tobytes())
+        else:
+            h.update(f"{type(part).__name__}:{part!r}|".encode("utf-8"))
+    return h.hexdigest()
+
+
+def approx_bytes(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if hasattr(value, "to_plotly_json"):
+        # plotly Figure: 직렬화 spec 길이로 추정
+        return len(value.to_json(validate=False))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+# ==============================================================================
+# [계산 결과 memo(메모리 LRU)]
+# - 집계 DataFrame, plotly Figure 등 rerun마다 다시 만들던 결과를 키별로 보관
+# - 항목 수·추정 바이트 두 기준으로 오래 안 쓴 것부터 제거
+# - 꺼낸 값은 공유 객체이므로 호출 측에서 수정하지 않음(필요하면 copy/assign)
+# ==============================================================================
+class MemoCache:
+    def __init__(self, max_items: int = MEMO_MAX_ITEMS, max_bytes: int = int(MEMO_MAX_MB * 1024 * 1024)):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # key -> (value, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+
+        # 계산은 잠금 밖에서(느린 계산이 다른 세션을 막지 않도록). 동시에 같은 키를 계산하면 나중 것이 덮어씀
+        value = compute()
+        size = approx_bytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+@functools.lru_cache(maxsize=1)
+def default_memo():
+    return MemoCache()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================================================================
+# [메모리 절약 저장 방식]
+# - 값 종류가 적은 컬럼(제품/국가/채널/피부타입/분석 라벨) → category(정수 코드 + 고유값 1벌)
+# - 리뷰 원문 → Arrow 문자열(행마다 파이썬 객체를 만들지 않음)
+# - rating → float32(값이 정확히 유지될 때만)
+# ==============================================================================
+CATEGORY_COLUMNS = [
+    "product_name", "country", "channel", "skin_type",
+    "sentiment", "gap_type", "issue_detail", "recommended_copy",
+]
+# 고유값 비율이 이보다 높으면 category가 오히려 커지므로 그대로 둠
+CATEGORY_MAX_RATIO = 0.5
+ARROW_TEXT_COLUMNS = ["review_text_original", "vob_text"]
+COMPACT_FLOAT = "float32"
+
+
+def _arrow_string_dtype():
+    # pandas 3의 기본 str dtype과 동일(결측은 NaN). pyarrow가 없거나 구버전 pandas면 None
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except (ImportError, TypeError):
+        return None
+
+
+ARROW_STRING = _arrow_string_dtype()
+
+
+def as_text(s: pd.Series, fill: str = "") -> pd.Series:
+    """결측을 fill로 채운 문자열 시리즈. category면 고유값 단위로 변환(카테고리에 없는 fill도 허용)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        table = np.append(s.cat.categories.astype(str).to_numpy(dtype=object), fill)
+        return pd.Series(table[s.cat.codes.to_numpy()], index=s.index, name=s.name)
+    return s.fillna(fill).astype(str)
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """같은 값을 유지한 채 dtype만 줄인 새 DataFrame(원본은 건드리지 않음)."""
+    out = df.copy(deep=False)
+    n = len(out)
+    for col in CATEGORY_COLUMNS:
+        if col not in out.columns or isinstance(out[col].dtype, pd.CategoricalDtype):
+            continue
+        if out[col].nunique(dropna=True) <= max(1, n * CATEGORY_MAX_RATIO):
+            out[col] = out[col].astype("category")
+
+    if ARROW_STRING is not None:
+        for col in ARROW_TEXT_COLUMNS:
+            # 파이썬 객체 문자열만 변환(pandas 3의 str은 이미 Arrow, 전부 결측인 float 자리 컬럼은 그대로)
+            if col in out.columns and pd.api.types.is_object_dtype(out[col].dtype):
+                out[col] = out[col].astype(ARROW_STRING)
+
+    if "rating" in out.columns:
+        rating = pd.to_numeric(out["rating"], errors="coerce")
+        narrowed = rating.astype(COMPACT_FLOAT)
+        # float32로 정확히 표현될 때만 줄임(1~5점, 0.5 단위 등). 4.3처럼 값이 바뀌면 그대로 둠
+        exact = np.array_equal(narrowed.to_numpy(dtype="float64", na_value=np.nan),
+                               rating.to_numpy(dtype="float64", na_value=np.nan), equal_nan=True)
+        if exact and out["rating"].notna().sum() == rating.notna().sum():
+            out["rating"] = narrowed
+    return out
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """컬럼별 (dtype, bytes) 전/후 비교. 마지막 행은 합계."""
+    b = before.memory_usage(deep=True, index=False)
+    a = after.memory_usage(deep=True, index=False)
+    rows = []
+    for col in after.columns:
+        rows.append({
+            "column": col,
+            "dtype_before": str(before[col].dtype) if col in before.columns else "-",
+            "bytes_before": int(b.get(col, 0)),
+            "dtype_after": str(after[col].dtype),
+            "bytes_after": int(a.get(col, 0)),
+        })
+    report = pd.DataFrame(rows)
+    total = {"column": "TOTAL", "dtype_before": "", "bytes_before": int(report["bytes_before"].sum()),
+             "dtype_after": "", "bytes_after": int(report["bytes_after"].sum())}
+    report = pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+    report["saved_pct"] = np.where(report["bytes_before"] > 0,
+                                   (1 - report["bytes_after"] / report["bytes_before"].clip(lower=1)) * 100, 0.0).round(1)
+    return report
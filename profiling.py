@@ -0,0 +1,265 @@
+import contextlib
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+
+PROFILE_DEFAULT = os.environ.get("INNIS_PROFILE", "0") == "1"
+PROFILE_HISTORY = int(os.environ.get("INNIS_PROFILE_HISTORY", "200"))
+# 지정하면 모든 세션의 rerun 기록을 이 파일에 JSON lines로 덧붙임(오프라인 분석용)
+PROFILE_TRACE_FILE = os.environ.get("INNIS_PROFILE_TRACE_FILE", "")
+# 1이면 프로세스 첫 화면이 그려질 때 시작 시간(import/첫 화면/지연 import)을 stderr에 한 줄(JSON)로 출력
+STARTUP_PROFILE = os.environ.get("INNIS_STARTUP_PROFILE", "0") == "1"
+HISTOGRAM_BINS = 12
+
+
+# ==============================================================================
+# [rerun 트레이스]
+# - step(name): 이전 구간을 닫고 새 구간 시작(main()의 큰 단계들을 들여쓰기 없이 구분)
+# - span(name): with 블록 하나를 별도 구간으로(LLM 호출처럼 함수 단위 측정)
+# - 구간마다 소요 시간, 처리 행 수(rows) 기록
+# ==============================================================================
+class RerunTrace:
+    enabled = True
+
+    def __init__(self, kind: str = "rerun"):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.started_at = time.time()
+        self.total = None
+        self.sections = []
+        self.llm_calls = []
+        self.outcome = "ok"
+        self._t0 = time.perf_counter()
+        self._open = None
+
+    def _close_step(self, now: float):
+        if self._open is not None:
+            name, start, rows = self._open
+            self.sections.append({"name": name, "seconds": now - start, "rows": rows, "nested": False})
+            self._open = None
+
+    def step(self, name: str, rows=None):
+        now = time.perf_counter()
+        self._close_step(now)
+        self._open = (name, now, rows)
+
+    def rows(self, n):
+        """현재 구간의 처리 행 수 지정(구간이 끝난 뒤에야 아는 경우)."""
+        if self._open is not None:
+            self._open = (self._open[0], self._open[1], int(n))
+
+    @contextlib.contextmanager
+    def span(self, name: str, rows=None):
+        rec = {"name": name, "seconds": 0.0, "rows": rows, "nested": True}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            self.sections.append(rec)
+
+    @contextlib.contextmanager
+    def llm(self, op: str, model: str, requests: int = 1):
+        """LLM 호출 1건(또는 묶음) 측정. 블록 안에서 rec["cached"]/["ok"]/["requests"] 갱신 가능."""
+        rec = {"op": op, "model": model, "requests": requests, "seconds": 0.0, "ok": True, "cached": False}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        except Exception:
+            rec["ok"] = False
+            raise
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            self.llm_calls.append(rec)
+
+    def finish(self, outcome: str = "ok"):
+        now = time.perf_counter()
+        self._close_step(now)
+        self.total = now - self._t0
+        self.outcome = outcome
+        return self
+
+    def to_record(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "started_at": round(self.started_at, 3),
+            "total": self.total,
+            "outcome": self.outcome,
+            "sections": self.sections,
+            "llm_calls": self.llm_calls,
+        }
+
+
+class _NullTrace:
+    """프로파일링이 꺼져 있을 때: 모든 호출이 아무 일도 하지 않음."""
+
+    enabled = False
+
+    def step(self, name, rows=None):
+        pass
+
+    def rows(self, n):
+        pass
+
+    @contextlib.contextmanager
+    def span(self, name, rows=None):
+        yield {}
+
+    @contextlib.contextmanager
+    def llm(self, op, model, requests=1):
+        yield {}
+
+
+NULL_TRACE = _NullTrace()
+_local = threading.local()
+
+
+def current_trace():
+    # streamlit은 세션마다 스크립트 스레드가 따로라 스레드별로 보관
+    return getattr(_local, "trace", None) or NULL_TRACE
+
+
+@contextlib.contextmanager
+def activate(trace: RerunTrace):
+    prev = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = prev
+
+
+def step(name: str, rows=None):
+    current_trace().step(name, rows)
+
+
+def set_rows(n):
+    current_trace().rows(n)
+
+
+def span(name: str, rows=None):
+    return current_trace().span(name, rows)
+
+
+def llm_call(op: str, model: str, requests: int = 1):
+    return current_trace().llm(op, model, requests)
+
+
+# ==============================================================================
+# [기록 보관/집계/내보내기]
+# ==============================================================================
+_file_lock = threading.Lock()
+
+
+def new_history():
+    return deque(maxlen=PROFILE_HISTORY)
+
+
+def record_trace(history, trace: RerunTrace):
+    rec = trace.to_record()
+    history.append(rec)
+    if PROFILE_TRACE_FILE:
+        try:
+            line = json.dumps(rec, ensure_ascii=False)
+            with _file_lock, open(PROFILE_TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+    return rec
+
+
+def traced_call(history, name: str, fn, *args, rows=None):
+    """rerun 밖(다운로드 콜백 등)에서 실행되는 작업을 단독 트레이스로 기록."""
+    trace = RerunTrace(kind=name)
+    with trace.span(name, rows=rows):
+        result = fn(*args)
+    record_trace(history, trace.finish())
+    return result
+
+
+def section_table(rec: dict):
+    """구간별 (이름, ms, 비중%, 행 수). span은 자신을 감싼 step 시간에도 포함되므로 └ 로 표시."""
+    total = rec.get("total") or 0.0
+    rows = []
+    for s in rec.get("sections", []):
+        rows.append({
+            "section": f"  └ {s['name']}" if s.get("nested") else s["name"],
+            "ms": round(s["seconds"] * 1000, 1),
+            "share_pct": round(s["seconds"] / total * 100, 1) if total > 0 else 0.0,
+            "rows": s.get("rows"),
+        })
+    return rows
+
+
+def latency_histogram(history, kind: str = "rerun", bins: int = HISTOGRAM_BINS):
+    """최근 rerun 총 소요 시간(ms) 히스토그램 → (구간 시작 ms 배열, 개수 배열)."""
+    totals = np.array([r["total"] * 1000 for r in history if r.get("kind") == kind and r.get("total") is not None])
+    if totals.size == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    counts, edges = np.histogram(totals, bins=min(bins, totals.size))
+    return edges[:-1].round(1), counts
+
+
+def latency_summary(history, kind: str = "rerun"):
+    totals = np.array([r["total"] for r in history if r.get("kind") == kind and r.get("total") is not None])
+    if totals.size == 0:
+        return None
+    return {
+        "count": int(totals.size),
+        "p50": float(np.percentile(totals, 50)),
+        "p95": float(np.percentile(totals, 95)),
+        "max": float(totals.max()),
+    }
+
+
+def export_jsonl(history) -> bytes:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in list(history)).encode("utf-8")
+
+
+# ==============================================================================
+# [시작 시간(콜드 스타트)]
+# - 프로세스당 처음 한 번만 기록: imports(app.py import 구간), first_paint(스크립트 첫 줄 → 첫 rerun 끝)
+# - lazy_import로 미룬 모듈은 처음 쓰일 때 걸린 import 시간을 따로 기록
+# ==============================================================================
+_startup = {"imports": None, "first_paint": None, "lazy_imports": {}}
+
+
+def lazy_import(name: str):
+    """name 모듈을 처음 쓸 때 import(이미 올라와 있으면 그대로 반환). 실패하면 ImportError."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    _startup["lazy_imports"].setdefault(name, time.perf_counter() - t0)
+    return module
+
+
+def mark_startup(name: str, seconds: float):
+    if _startup.get(name) is not None:
+        return
+    _startup[name] = seconds
+    if name == "first_paint":
+        rec = {"kind": "startup", "started_at": round(time.time(), 3), **startup_report()}
+        if STARTUP_PROFILE:
+            sys.stderr.write("innis-startup " + json.dumps(rec) + "\n")
+        if PROFILE_TRACE_FILE:
+            try:
+                with _file_lock, open(PROFILE_TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            except OSError:
+                pass
+
+
+def startup_report() -> dict:
+    return {"imports": _startup["imports"], "first_paint": _startup["first_paint"],
+            "lazy_imports": dict(_startup["lazy_imports"])}
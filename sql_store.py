@@ -0,0 +1,412 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import CACHE_DIR
+from analysis_engine import ANALYSIS_COLUMNS, RULESET_VERSION, apply_analysis
+from exports import write_chunks
+from ingest import iter_reviews_csv
+from labels import add_label_codes
+
+# ✅ DuckDB가 있으면 컬럼형 저장소로, 없으면 표준 라이브러리 SQLite로 동작
+try:
+    import duckdb
+except Exception:
+    duckdb = None
+
+
+SQL_DIR = os.path.join(CACHE_DIR, "sql")
+SQL_BACKEND = os.environ.get("INNIS_SQL_BACKEND", "auto")  # auto | duckdb | sqlite
+SQL_INGEST_ROWS = 100_000
+# 테이블 구조가 바뀌면 올림(이전 구조로 만든 저장소 파일은 다시 적재)
+STORE_SCHEMA_VERSION = 2
+SQL_KEEP_STORES = int(os.environ.get("INNIS_SQL_KEEP_STORES", "4"))
+# 세션들이 함께 쓰는 열린 저장소(연결) 수. 여기 있는 저장소 파일은 prune_stores가 지우지 않음
+SQL_OPEN_STORES = 8
+# 서버에 둔 대용량 CSV(연간 아카이브 등) 폴더. 지정하면 업로드 없이 경로로 열 수 있음
+SQL_DATA_DIR = os.environ.get("INNIS_DATA_DIR", "")
+
+STORE_COLUMNS = [
+    "review_id", "product_name", "review_text_original", "rating", "country", "channel", "skin_type",
+    "sentiment", "gap_type", "issue_detail", "recommended_copy", "vob_text",
+    "sentiment_code", "gap_code", "gap_type_ko",
+]
+NUMERIC_STORE_COLUMNS = {"rating": "DOUBLE", "sentiment_code": "INTEGER", "gap_code": "INTEGER"}
+EXPORT_STORE_COLUMNS = STORE_COLUMNS[:-3]
+SEARCH_STORE_COLUMNS = ["review_text_original", "issue_detail", "gap_type"]
+FILTER_STORE_DIMENSIONS = ["country", "channel", "skin_type"]
+PRODUCT_EXPR = "COALESCE(product_name, 'Unknown')"
+
+
+def resolve_backend(name: str = SQL_BACKEND) -> str:
+    if name == "duckdb" or (name == "auto" and duckdb is not None):
+        if duckdb is None:
+            raise RuntimeError("duckdb 패키지가 설치되어 있지 않습니다.")
+        return "duckdb"
+    return "sqlite"
+
+
+def source_key(source) -> str:
+    """업로드(bytes)는 내용 해시, 서버 경로는 (경로, 크기, 수정 시각) 해시 — 수 GB 파일을 다시 읽지 않음."""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    st_ = os.stat(source)
+    return hashlib.sha256(f"{os.path.abspath(source)}|{st_.st_size}|{st_.st_mtime_ns}".encode("utf-8")).hexdigest()
+
+
+def _iter_upload_blocks(file, block_bytes: int = 1 << 20):
+    file.seek(0)
+    while True:
+        block = file.read(block_bytes)
+        if not block:
+            break
+        yield block.encode("utf-8") if isinstance(block, str) else block
+    file.seek(0)
+
+
+def upload_key(file) -> str:
+    """업로드 파일 내용 해시. 1MB씩 읽어 파일 전체를 bytes로 복사하지 않음."""
+    h = hashlib.sha256()
+    for block in _iter_upload_blocks(file):
+        h.update(block)
+    return h.hexdigest()
+
+
+def spool_upload(file, key: str) -> str:
+    """적재 작업에 넘길 업로드를 SQL_DIR 아래 임시 파일로 복사(블록 단위)하고 경로 반환.
+    작업 스레드는 세션의 업로드 객체 대신 이 파일을 읽고, 적재가 끝나면 지움."""
+    os.makedirs(SQL_DIR, exist_ok=True)
+    path = os.path.join(SQL_DIR, f"{key[:32]}.upload.tmp")
+    with open(path, "wb") as f:
+        for block in _iter_upload_blocks(file):
+            f.write(block)
+    return path
+
+
+def store_path(key: str, backend: str) -> str:
+    return os.path.join(SQL_DIR, f"{key[:32]}_{RULESET_VERSION}_s{STORE_SCHEMA_VERSION}.{backend}")
+
+
+def list_data_files():
+    if not SQL_DATA_DIR or not os.path.isdir(SQL_DATA_DIR):
+        return []
+    return sorted(n for n in os.listdir(SQL_DATA_DIR) if n.lower().endswith(".csv"))
+
+
+def data_file_path(name: str) -> str:
+    # 목록에 있는 파일 이름만 받음(상위 폴더 경로 차단)
+    return os.path.join(SQL_DATA_DIR, os.path.basename(name))
+
+
+# ==============================================================================
+# [적재: CSV → 임베디드 DB]
+# - SQL_INGEST_ROWS 행씩 읽고 → (gap_type이 빈 행만) 규칙 기반 분석 → 라벨 코드 → 테이블에 추가
+# - 임시 파일에 만들고 끝나면 이름 변경(중간에 멈춘 적재를 완성본으로 착각하지 않음)
+# ==============================================================================
+def _connect(path: str, backend: str, read_only: bool = False):
+    if backend == "duckdb":
+        return duckdb.connect(path, read_only=read_only)
+    uri = f"file:{path}?mode=ro" if read_only else path
+    return sqlite3.connect(uri, uri=read_only, check_same_thread=False)
+
+
+def _fill_missing_analysis(chunk: pd.DataFrame) -> pd.DataFrame:
+    """gap_type이 빈 행만 규칙 기반으로 분석(분석 결과가 있는 행은 그대로). 파일 앞부분에만 라벨이 있어도
+    뒤쪽 행이 빈 Gap으로 남지 않음."""
+    missing = chunk["gap_type"].isna().to_numpy()
+    if missing.all():
+        return apply_analysis(chunk)
+    if not missing.any():
+        return chunk
+    filled = apply_analysis(chunk[missing])
+    chunk = chunk.copy()
+    for col in ANALYSIS_COLUMNS:
+        values = chunk[col].astype(object) if col in chunk.columns else pd.Series(None, index=chunk.index, dtype=object)
+        values[missing] = filled[col].to_numpy()
+        chunk[col] = values
+    return chunk
+
+
+def _prepare_chunk(chunk: pd.DataFrame, start_row: int) -> pd.DataFrame:
+    chunk = add_label_codes(_fill_missing_analysis(chunk))
+    out = pd.DataFrame({"row_no": np.arange(start_row, start_row + len(chunk), dtype=np.int64)})
+    for col in STORE_COLUMNS:
+        values = chunk[col] if col in chunk.columns else pd.Series(np.nan, index=chunk.index)
+        if col in NUMERIC_STORE_COLUMNS:
+            out[col] = pd.to_numeric(values, errors="coerce").to_numpy()
+        else:
+            values = values.astype(object)
+            out[col] = values.where(values.notna(), None).map(lambda v: v if v is None else str(v)).to_numpy()
+    return out
+
+
+def _create_table(con, backend: str):
+    cols = ", ".join(f"{c} {NUMERIC_STORE_COLUMNS.get(c, 'TEXT')}" for c in STORE_COLUMNS)
+    # row_no는 내보내기 키셋 페이지(row_no > ? ORDER BY row_no)의 키:
+    # SQLite는 rowid 별칭(INTEGER PRIMARY KEY)으로 범위 탐색, DuckDB는 적재 순서대로 들어가 zonemap으로 건너뜀
+    row_no = "row_no INTEGER PRIMARY KEY" if backend == "sqlite" else "row_no BIGINT"
+    con.execute(f"CREATE TABLE reviews ({row_no}, {cols})")
+
+
+def _insert(con, backend: str, part: pd.DataFrame):
+    if backend == "duckdb":
+        con.register("_chunk", part)
+        con.execute("INSERT INTO reviews SELECT * FROM _chunk")
+        con.unregister("_chunk")
+        return
+    placeholders = ", ".join("?" * (len(STORE_COLUMNS) + 1))
+    rows = part.astype(object).where(part.notna(), None).itertuples(index=False, name=None)
+    con.executemany(f"INSERT INTO reviews VALUES ({placeholders})", rows)
+
+
+def build_store(source, path: str, backend: str, on_progress=None, should_stop=None, chunk_rows: int = SQL_INGEST_ROWS):
+    """source(경로 또는 bytes)를 path에 적재. on_progress(적재 행 수, 추정 전체 행 수)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    if isinstance(source, (bytes, bytearray)):
+        total_bytes, stream = len(source), io.BytesIO(source)
+    else:
+        total_bytes, stream = os.path.getsize(source), open(source, "rb")
+
+    con = _connect(tmp, backend)
+    try:
+        _create_table(con, backend)
+        done = 0
+        for chunk in iter_reviews_csv(stream, chunk_rows):
+            if should_stop is not None:
+                should_stop()
+            _insert(con, backend, _prepare_chunk(chunk, done))
+            done += len(chunk)
+            if on_progress is not None:
+                # 전체 행 수는 모르므로 지금까지의 행당 바이트로 추정
+                consumed = stream.tell()
+                estimate = int(done * total_bytes / consumed) if consumed else done
+                on_progress(done, max(done, estimate))
+        if backend == "sqlite":
+            # 필터·그룹 집계가 자주 쓰는 컬럼만 인덱스
+            for col in ["product_name"] + FILTER_STORE_DIMENSIONS + ["rating"]:
+                con.execute(f"CREATE INDEX idx_{col} ON reviews({col})")
+        con.commit()
+    finally:
+        con.close()
+        stream.close()
+    os.replace(tmp, path)
+    prune_stores(keep=path)
+    return done
+
+
+def prune_stores(keep: str = None, max_stores: int = SQL_KEEP_STORES):
+    """최근 max_stores개만 남기고 지움. 다른 세션이 open_store로 열어 보고 있는 저장소는 건너뜀."""
+    try:
+        entries = [os.path.join(SQL_DIR, n) for n in os.listdir(SQL_DIR) if not n.endswith(".tmp")]
+    except OSError:
+        return
+    entries.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    # 지우는 동안 open_store가 같은 파일을 새로 열지 않도록 같은 잠금 안에서 판단
+    with _open_lock:
+        for path in entries[max_stores:]:
+            if path == keep or path in _open_stores:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# ==============================================================================
+# [조회: 필터/검색/집계를 SQL로 실행하고 결과만 pandas로]
+# - where(...) → (조건 SQL, 파라미터). 이후 모든 조회는 같은 조건을 받음
+# - 필터 의미는 FilterIndex와 동일(결측은 어떤 값에도 매칭 안 됨, 평점 값이 하나라도 있을 때만 평점 필터)
+# - 검색은 단어별 부분 문자열 AND(대소문자 무시, "deliv*"의 *는 무시)
+# ==============================================================================
+def _like_pattern(word: str) -> str:
+    escaped = word.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class ReviewStore:
+    def __init__(self, path: str, backend: str):
+        self.path = path
+        self.backend = backend
+        self._con = _connect(path, backend, read_only=True)
+        self._lock = threading.Lock()
+        self.n_rows = int(self._scalar("SELECT COUNT(*) FROM reviews"))
+        # 개수가 같은 Gap 유형은 파일에 처음 나온 순서로(pandas 카테고리 value_counts와 같은 순서)
+        _, rows = self._execute("SELECT gap_type_ko, MIN(row_no) FROM reviews GROUP BY 1")
+        self._gap_order = {str(k): int(v) for k, v in rows}
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            cur = self._con.cursor()
+            cur.execute(sql, list(params))
+            cols = [d[0] for d in cur.description]
+            return cols, cur.fetchall()
+
+    def _scalar(self, sql: str, params=()):
+        return self._execute(sql, params)[1][0][0]
+
+    def query_df(self, sql: str, params=()) -> pd.DataFrame:
+        cols, rows = self._execute(sql, params)
+        return pd.DataFrame.from_records(rows, columns=cols)
+
+    # ---------------- 조건 ----------------
+    def options(self, dim: str):
+        _, rows = self._execute(f"SELECT DISTINCT {dim} FROM reviews WHERE {dim} IS NOT NULL")
+        return sorted(str(r[0]) for r in rows if str(r[0]).strip())
+
+    def where(self, selections: dict = None, rating_range=None, query: str = ""):
+        clauses, params = [], []
+        for dim, value in (selections or {}).items():
+            if value is not None:
+                clauses.append(f"{dim} = ?")
+                params.append(str(value))
+
+        if rating_range is not None:
+            dims_sql = " AND ".join(clauses) or "1=1"
+            has_rating = self._scalar(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM reviews WHERE {dims_sql} AND rating IS NOT NULL LIMIT 1) t", params)
+            if has_rating:
+                clauses.append("rating BETWEEN ? AND ?")
+                params.extend([float(rating_range[0]), float(rating_range[1])])
+
+        for word in str(query or "").lower().split():
+            word = word[:-1] if word.endswith("*") and len(word) > 1 else word
+            ors = [f"LOWER(COALESCE({c}, '')) LIKE ? ESCAPE '\\'" for c in SEARCH_STORE_COLUMNS]
+            clauses.append("(" + " OR ".join(ors) + ")")
+            params.extend([_like_pattern(word)] * len(ors))
+        return " AND ".join(clauses) or "1=1", params
+
+    @staticmethod
+    def and_(where, clause: str, *params):
+        return f"({where[0]}) AND {clause}", list(where[1]) + list(params)
+
+    def for_product(self, where, product):
+        return self.and_(where, f"{PRODUCT_EXPR} = ?", str(product))
+
+    def for_products(self, where, products):
+        products = [str(p) for p in products]
+        if not products:
+            return self.and_(where, "1=0")
+        return self.and_(where, f"{PRODUCT_EXPR} IN ({', '.join('?' * len(products))})", *products)
+
+    # ---------------- 집계 ----------------
+    def count(self, where) -> int:
+        return int(self._scalar(f"SELECT COUNT(*) FROM reviews WHERE {where[0]}", where[1]))
+
+    def products(self, where):
+        _, rows = self._execute(f"SELECT DISTINCT {PRODUCT_EXPR} FROM reviews WHERE {where[0]}", where[1])
+        return sorted(str(r[0]) for r in rows)
+
+    _COUNT_COLUMNS = (
+        "COUNT(*) AS total, "
+        "SUM(CASE WHEN (sentiment_code & 1) != 0 THEN 1 ELSE 0 END) AS pos, "
+        "SUM(CASE WHEN gap_code = 0 THEN 1 ELSE 0 END) AS nogap, "
+        "SUM(CASE WHEN (sentiment_code & 2) != 0 THEN 1 ELSE 0 END) AS neg"
+    )
+
+    def label_counts(self, where) -> dict:
+        cols, rows = self._execute(f"SELECT {self._COUNT_COLUMNS} FROM reviews WHERE {where[0]}", where[1])
+        return {c: int(v or 0) for c, v in zip(cols, rows[0])}
+
+    def product_counts(self, where) -> pd.DataFrame:
+        """제품별 total/pos/nogap/neg(제품명 순)."""
+        df = self.query_df(
+            f"SELECT {PRODUCT_EXPR} AS product_name, {self._COUNT_COLUMNS} FROM reviews "
+            f"WHERE {where[0]} GROUP BY 1", where[1])
+        for col in ["total", "pos", "nogap", "neg"]:
+            df[col] = df[col].fillna(0).astype(np.int64)
+        return df.sort_values("product_name", kind="stable").reset_index(drop=True)
+
+    def gap_counts(self, where) -> pd.DataFrame:
+        df = self.query_df(
+            f"SELECT gap_type_ko AS \"Gap Type\", COUNT(*) AS \"Count\" FROM reviews "
+            f"WHERE {where[0]} AND gap_code != -1 GROUP BY 1 ORDER BY 2 DESC, 1", where[1])
+        df["Gap Type"] = df["Gap Type"].astype(str)
+        return df
+
+    def gap_type_counts(self, where) -> pd.Series:
+        """Gap(No Gap 제외) 리뷰의 한글 Gap 유형별 개수(많은 순)."""
+        df = self.query_df(
+            f"SELECT gap_type_ko, COUNT(*) AS n FROM reviews WHERE {where[0]} AND gap_code != 0 GROUP BY 1", where[1])
+        df["gap_type_ko"] = df["gap_type_ko"].astype(str)
+        df["first"] = df["gap_type_ko"].map(self._gap_order)
+        df = df.sort_values(["n", "first"], ascending=[False, True], kind="stable")
+        return pd.Series(df["n"].to_numpy(), index=df["gap_type_ko"].to_numpy(), name="count")
+
+    def issue_map_counts(self, where) -> pd.DataFrame:
+        return self.query_df(
+            f"SELECT {PRODUCT_EXPR} AS product_name, gap_type_ko, COUNT(*) AS count FROM reviews "
+            f"WHERE {where[0]} AND gap_code != 0 GROUP BY 1, 2 ORDER BY 1, 2", where[1])
+
+    def top_issues(self, where, k: int = 3) -> pd.DataFrame:
+        """Gap 리뷰의 issue_detail 상위 k개: issue, count, 첫 행의 gap_type/gap_type_ko."""
+        top = self.query_df(
+            f"SELECT issue_detail AS issue, COUNT(*) AS count, MIN(row_no) AS first_row FROM reviews "
+            f"WHERE {where[0]} AND gap_code != 0 AND issue_detail IS NOT NULL "
+            f"GROUP BY 1 ORDER BY 2 DESC, 3 LIMIT {int(k)}", where[1])
+        if top.empty:
+            return top.assign(gap_type=[], gap_type_ko=[])
+        firsts = self.query_df(
+            f"SELECT row_no, gap_type, gap_type_ko FROM reviews WHERE row_no IN ({', '.join('?' * len(top))})",
+            top["first_row"].tolist())
+        return top.merge(firsts, left_on="first_row", right_on="row_no", how="left").drop(columns=["row_no"])
+
+    def rows(self, where, columns, limit: int = None, after_row: int = -1) -> pd.DataFrame:
+        """조건에 맞는 행을 원래 순서로(row_no > after_row). limit 없으면 전부."""
+        cols = ", ".join(["row_no"] + list(columns))
+        sql = f"SELECT {cols} FROM reviews WHERE ({where[0]}) AND row_no > ? ORDER BY row_no"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query_df(sql, list(where[1]) + [int(after_row)])
+
+    def iter_rows(self, where, columns=EXPORT_STORE_COLUMNS, chunk_rows: int = SQL_INGEST_ROWS):
+        # row_no 기준 키셋 페이지네이션(OFFSET 없이 청크마다 이어서 읽음)
+        last = -1
+        first = True
+        while True:
+            part = self.rows(where, columns, limit=chunk_rows, after_row=last)
+            if part.empty:
+                if first:
+                    yield part.drop(columns=["row_no"])
+                return
+            first = False
+            last = int(part["row_no"].iloc[-1])
+            yield part.drop(columns=["row_no"])
+            if len(part) < chunk_rows:
+                return
+
+
+def export_query_bytes(store: ReviewStore, where, fmt: str) -> bytes:
+    """다운로드 버튼 콜백: 조건에 맞는 행을 청크로 읽어 CSV/CSV(gzip)/Parquet로."""
+    buf = io.BytesIO()
+    write_chunks(store.iter_rows(where), fmt, buf)
+    return buf.getvalue()
+
+
+_open_stores = OrderedDict()  # path → ReviewStore(최근 쓴 순)
+_open_lock = threading.Lock()
+
+
+def open_store(path: str, backend: str) -> ReviewStore:
+    # 같은 DB 파일은 세션들이 연결 하나를 공유(읽기 전용)
+    with _open_lock:
+        store = _open_stores.get(path)
+        if store is not None:
+            _open_stores.move_to_end(path)
+            return store
+    # 연결·행 수 조회는 잠금 밖에서(다른 세션의 조회를 막지 않음), 동시에 열었으면 먼저 등록된 것을 사용
+    store = ReviewStore(path, backend)
+    with _open_lock:
+        store = _open_stores.setdefault(path, store)
+        _open_stores.move_to_end(path)
+        while len(_open_stores) > SQL_OPEN_STORES:
+            _open_stores.popitem(last=False)
+    return store
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 앱 모듈(analysis_engine 등)은 저장소 루트에 있음
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
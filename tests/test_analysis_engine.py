@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_engine import (
+    ANALYSIS_COLUMNS, GAP_RULES, SENTIMENT_RULES, analyze_reviews, analyze_reviews_parallel, apply_analysis,
+    smart_mock_analysis,
+)
+
+
+def reference_analysis(text):
+    """분석 엔진 도입 전 app.py의 행 단위 if/elif 분류(규칙 테이블을 위에서부터 순서대로)."""
+    text_lower = str(text).lower()
+    sentiment = "Neutral"
+    for rule in SENTIMENT_RULES:
+        if any(w in text_lower for w in rule["keywords"]):
+            sentiment = rule["sentiment"]
+            break
+    if sentiment == "Positive":
+        return {"sentiment": sentiment, "gap_type": "No Gap", "issue_detail": "Satisfied customer",
+                "recommended_copy": "Thank you for your love!"}
+    for rule in GAP_RULES:
+        if any(w in text_lower for w in rule["keywords"]):
+            return {"sentiment": sentiment, "gap_type": rule["gap_type"], "issue_detail": rule["issue_detail"],
+                    "recommended_copy": rule["recommended_copy"]}
+    return {"sentiment": sentiment, "gap_type": "Product Performance",
+            "issue_detail": "Performance did not meet expectation",
+            "recommended_copy": "Clear expectations with usage guide for best results."}
+
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "LOVE this toner",                               # 대문자 키워드
+    "Holy Grail serum",                              # 여러 단어 키워드 + 대소문자
+    "love it but the pump is broken",                # 긍정 우선(Gap 규칙 무시)
+    "Terrible. Sticky and the delivery was LATE",    # 여러 Gap 규칙 → 먼저 나온 규칙(Texture)
+    "broken pump, damaged box",                      # 감성/Gap 양쪽 규칙에 걸림
+    "wrong item sent, waiting for courier",
+    "Too Drying for my skin, breakout",
+    "no free gift and no sample",
+    "freebies missing",                              # 부분 문자열 매칭
+    "it's okay",                                     # 아무 규칙도 없음
+    "not authentic? FAKE",
+    "배송이 늦어요 delivery",                          # 비 ASCII 섞임
+    "gre at",                                        # 키워드가 끊긴 경우
+]
+
+
+def corpus(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    words = [kw for rule in SENTIMENT_RULES + GAP_RULES for kw in rule["keywords"]]
+    words += ["the", "toner", "Cream", "skin", "ok", "bottle", "NICE", "smell"]
+    texts = [" ".join(rng.choice(words, size=rng.integers(0, 6))) for _ in range(n)]
+    # 대소문자 섞기 + 중복 리뷰
+    texts = [t.upper() if i % 5 == 0 else t.title() if i % 7 == 0 else t for i, t in enumerate(texts)]
+    return texts + texts[:200] + EDGE_CASES
+
+
+def labels(df):
+    return df[ANALYSIS_COLUMNS].to_dict("records")
+
+
+def test_matches_per_row_function_on_corpus():
+    texts = pd.Series(corpus())
+    expected = [smart_mock_analysis(t) for t in texts]
+    assert labels(analyze_reviews(texts)) == expected
+    assert expected == [reference_analysis(t) for t in texts]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_reference(text):
+    assert labels(analyze_reviews(pd.Series([text]))) == [reference_analysis(text)]
+
+
+def test_missing_text_is_neutral_performance():
+    texts = pd.Series(["love it", None, np.nan, pd.NA, ""], dtype=object)
+    out = analyze_reviews(texts)
+    # 기존 행 단위 처리와 동일: 결측은 str()로 바뀌어 어떤 키워드에도 걸리지 않음
+    for text in [None, np.nan, ""]:
+        assert smart_mock_analysis(text) == reference_analysis("")
+    assert labels(out)[1:] == [reference_analysis("")] * 4
+    assert labels(out)[0]["sentiment"] == "Positive"
+
+
+def test_keeps_index_and_handles_empty():
+    texts = pd.Series(["late delivery", "LOVE"], index=[10, 3])
+    out = analyze_reviews(texts)
+    assert list(out.index) == [10, 3]
+    assert list(out.columns) == ANALYSIS_COLUMNS
+
+    empty = analyze_reviews(pd.Series([], dtype=object))
+    assert empty.empty and list(empty.columns) == ANALYSIS_COLUMNS
+
+
+def test_apply_analysis_chunks_match_single_pass():
+    df = pd.DataFrame({"review_text_original": corpus(500), "rating": 1.0})
+    out = apply_analysis(df, chunk_size=64)
+    assert labels(out) == labels(analyze_reviews(df["review_text_original"]))
+    assert out["rating"].tolist() == df["rating"].tolist()
+
+
+def test_parallel_matches_single_process():
+    texts = pd.Series(corpus(400))
+    assert labels(analyze_reviews_parallel(texts, workers=2)) == labels(analyze_reviews(texts))
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_engine import ANALYSIS_COLUMNS, FALLBACK_COLUMN, apply_analysis
+from incremental import SNAPSHOT_COLUMNS, apply_incremental_analysis, split_fallback
+from jobs import AnalysisJob, ChunkCheckpoint, run_chunked
+
+
+def frame(n):
+    return pd.DataFrame({"review_text_original": [f"review {i} too sticky" for i in range(n)]})
+
+
+def flagged_analysis(failing):
+    """failing에 든 텍스트는 규칙 기반 대체로 표시하는 analyze."""
+    def _analyze(df):
+        out = apply_analysis(df)
+        out[FALLBACK_COLUMN] = df["review_text_original"].isin(failing).to_numpy()
+        return out
+    return _analyze
+
+
+def test_fallback_rows_are_not_snapshotted():
+    df = frame(6)
+    failing = set(df["review_text_original"].iloc[[1, 4]])
+    out, snapshot, stats = apply_incremental_analysis(df, flagged_analysis(failing))
+
+    assert FALLBACK_COLUMN not in out.columns
+    assert out[ANALYSIS_COLUMNS].notna().all().all()
+    assert list(snapshot.columns) == SNAPSHOT_COLUMNS
+    assert len(snapshot) == 4
+    assert stats["fallback"] == 2
+
+    # 다음 실행에서는 대체됐던 행만 다시 분석
+    seen = []
+
+    def _analyze(sub):
+        seen.extend(sub["review_text_original"])
+        return apply_analysis(sub)
+
+    _, snapshot, stats = apply_incremental_analysis(df, _analyze, snapshot)
+    assert set(seen) == failing
+    assert stats["reused"] == 4 and stats["fallback"] == 0
+    assert len(snapshot) == 6
+
+
+def test_checkpoint_keeps_fallback_flag(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = frame(5)
+    failing = {df["review_text_original"].iloc[3]}
+
+    def _chunk(chunk, report):
+        return flagged_analysis(failing)(chunk)
+
+    first = run_chunked(df, _chunk, AnalysisJob("k"), ChunkCheckpoint(str(tmp_path), "k", "sig"), chunk_size=2)
+
+    def _fail(chunk, report):
+        raise AssertionError("체크포인트에서 복원되어야 함")
+
+    job = AnalysisJob("k")
+    resumed = run_chunked(df, _fail, job, ChunkCheckpoint(str(tmp_path), "k", "sig"), chunk_size=2)
+    assert job.resumed == 5
+    np.testing.assert_array_equal(resumed[FALLBACK_COLUMN].to_numpy(), [False, False, False, True, False])
+    pd.testing.assert_frame_equal(resumed, first)
+
+
+def test_split_fallback_counts_and_drops_flag():
+    df = frame(4)
+    failing = {df["review_text_original"].iloc[2]}
+    analyzed, fallback_rows = split_fallback(flagged_analysis(failing)(df))
+    assert fallback_rows == 1
+    assert FALLBACK_COLUMN not in analyzed.columns
+
+    analyzed, fallback_rows = split_fallback(apply_analysis(df))
+    assert fallback_rows == 0
+    assert list(analyzed.columns) == list(apply_analysis(df).columns)
+
+
+@pytest.mark.parametrize("use_delta", [False, True])
+def test_analysis_job_does_not_cache_fallback_results(monkeypatch, tmp_path, use_delta):
+    pytest.importorskip("pyarrow")
+    import app
+    import incremental
+    import jobs
+    import llm_backend
+    from incremental import DeltaSnapshotStore
+
+    df = frame(6)
+    failing = {df["review_text_original"].iloc[0]}
+
+    class FakeCache:
+        def __init__(self):
+            self.puts = []
+
+        def put(self, key, value):
+            self.puts.append(key)
+            return True
+
+    cache = FakeCache()
+    monkeypatch.setattr(app, "default_cache", lambda: cache)
+    monkeypatch.setattr(jobs, "checkpoint_for", lambda *args: None)
+    monkeypatch.setattr(incremental, "default_snapshot_store", lambda: DeltaSnapshotStore(str(tmp_path)))
+
+    def fake_llm(chunk, failing=failing, **kwargs):
+        return flagged_analysis(failing)(chunk), llm_backend.new_stats()
+
+    monkeypatch.setattr(llm_backend, "apply_llm_analysis", fake_llm)
+    run = app.make_analysis_job(df, "job", "snap", True, "key", False, use_delta, compact=False)
+    job = AnalysisJob("job")
+    key = run(job)
+    assert key != app.dataset_key("job", False, "analyzed")
+    lease = app.default_dataset_store().acquire(key)
+    assert FALLBACK_COLUMN not in lease.dataset.df.columns
+    lease.release()
+    assert job.stats["fallback"] == 1
+    assert cache.puts == []
+
+    # 실패가 없으면(증분 모드는 대체됐던 행만 다시 분석) 그때 캐시에 저장
+    failing.clear()
+    job = AnalysisJob("job")
+    assert run(job) == app.dataset_key("job", False, "analyzed")
+    assert job.stats["fallback"] == 0
+    assert cache.puts == ["job"]
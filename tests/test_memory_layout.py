@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from memory_layout import COMPACT_FLOAT, compact_frame
+
+
+@pytest.mark.parametrize("values", [
+    [1.0, 2.5, 5.0, np.nan],
+    [1, 2, 3, 4],
+    ["5", "4.5", None],
+])
+def test_rating_downcast_when_exact(values):
+    df = pd.DataFrame({"rating": values})
+    out = compact_frame(df)
+    assert out["rating"].dtype == COMPACT_FLOAT
+    expected = pd.to_numeric(df["rating"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    np.testing.assert_array_equal(out["rating"].to_numpy(dtype="float64"), expected)
+
+
+@pytest.mark.parametrize("values", [
+    [4.3, 5.0],
+    [3.7, np.nan, 1.0],
+])
+def test_rating_kept_when_float32_changes_values(values):
+    df = pd.DataFrame({"rating": values})
+    out = compact_frame(df)
+    assert out["rating"].dtype == "float64"
+    np.testing.assert_array_equal(out["rating"].to_numpy(), df["rating"].to_numpy())
+
+
+def test_unparseable_rating_left_alone():
+    df = pd.DataFrame({"rating": ["5", "great"]})
+    out = compact_frame(df)
+    assert out["rating"].tolist() == ["5", "great"]
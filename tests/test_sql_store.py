@@ -0,0 +1,49 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import sql_store
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sql_store, "SQL_DIR", str(tmp_path / "sql"))
+    monkeypatch.setattr(sql_store, "_open_stores", type(sql_store._open_stores)())
+    os.makedirs(sql_store.SQL_DIR)
+    csv = tmp_path / "reviews.csv"
+    pd.DataFrame({
+        "product_name": ["A", "B", "A"],
+        "review_text_original": ["love it", "too sticky", "late delivery"],
+        "rating": [5, 2, 3],
+    }).to_csv(csv, index=False)
+    return str(csv)
+
+
+def make_stores(csv, n, monkeypatch):
+    prune = sql_store.prune_stores
+    monkeypatch.setattr(sql_store, "prune_stores", lambda **kwargs: None)  # 만드는 동안은 정리하지 않음
+    paths = []
+    for i in range(n):
+        path = sql_store.store_path(f"{i:032d}", "sqlite")
+        sql_store.build_store(csv, path, "sqlite")
+        os.utime(path, (time.time() - (n - i) * 10,) * 2)  # 앞쪽일수록 오래된 파일
+        paths.append(path)
+    monkeypatch.setattr(sql_store, "prune_stores", prune)
+    return paths
+
+
+def test_prune_keeps_recent_and_open_stores(store_dir, monkeypatch):
+    paths = make_stores(store_dir, 6, monkeypatch)
+    oldest = sql_store.open_store(paths[0], "sqlite")
+
+    sql_store.prune_stores(max_stores=2)
+
+    assert [os.path.exists(p) for p in paths] == [True, False, False, False, True, True]
+    assert oldest.count(oldest.where()) == 3
+
+
+def test_open_store_shares_one_connection(store_dir, monkeypatch):
+    path = make_stores(store_dir, 1, monkeypatch)[0]
+    assert sql_store.open_store(path, "sqlite") is sql_store.open_store(path, "sqlite")
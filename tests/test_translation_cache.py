@@ -0,0 +1,16 @@
+from translation_cache import PersistentLRUCache
+
+
+def test_unwritable_directory_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("x")
+    cache = PersistentLRUCache(str(blocker / "sub" / "t.sqlite3"))
+    assert cache.get("k") is None
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+
+
+def test_values_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache" / "t.sqlite3")
+    PersistentLRUCache(path).put("k", "v")
+    assert PersistentLRUCache(path).get("k") == "v"
@@ -0,0 +1,82 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from analysis_cache import CACHE_DIR
+
+
+TRANSLATION_MEMORY_ITEMS = 2048
+
+
+def translation_key(text: str, target_lang: str, model: str) -> str:
+    digest = hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+    return f"{digest}:{target_lang}:{model}"
+
+
+# ==============================================================================
+# [2단계 캐시: 메모리 LRU + SQLite]
+# ==============================================================================
+class PersistentLRUCache:
+    """프로세스 메모리 LRU(1차) + 디스크 SQLite(2차). 문자열 key → 문자열 value."""
+
+    def __init__(self, path: str, max_items: int = TRANSLATION_MEMORY_ITEMS):
+        self.max_items = max_items
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            # 디스크를 못 쓰는 환경(디렉터리 생성 실패 포함)이면 메모리 캐시만 사용
+            if self._db is not None:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                return self._mem[key]
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, updated) VALUES (?, ?, ?)", (key, value, time.time())
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+
+@functools.lru_cache(maxsize=1)
+def default_translation_cache():
+    return PersistentLRUCache(os.path.join(CACHE_DIR, "translations.sqlite3"))